@@ -7,7 +7,7 @@ from sqlalchemy import pool
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
-from src.config import Settings
+from src.config import get_settings
 from src.db.session import Base
 from src.db import models  # noqa: F401 - register models
 
@@ -15,7 +15,7 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-settings = Settings()
+settings = get_settings()
 config.set_main_option("sqlalchemy.url", settings.database_url_sync)
 
 # For run_migrations_offline we use sync URL
@@ -0,0 +1,47 @@
+"""add_daily_global_stats
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_global_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("active_planners", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("plans_created", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("tasks_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("plans_full", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("plans_partial", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("plans_zero", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("avg_percent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("notifications_sent", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("notifications_failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+    # The rollup filters by these columns one day at a time.
+    op.create_index(op.f("ix_plan_date"), "plan", ["date"], unique=False)
+    op.create_index(op.f("ix_plan_created_at"), "plan", ["created_at"], unique=False)
+    op.create_index(op.f("ix_notification_log_created_at"), "notification_log", ["created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_notification_log_created_at"), table_name="notification_log")
+    op.drop_index(op.f("ix_plan_created_at"), table_name="plan")
+    op.drop_index(op.f("ix_plan_date"), table_name="plan")
+    op.drop_table("daily_global_stats")
@@ -0,0 +1,44 @@
+"""add_reminder_event
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "reminder_event",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("reminder_id", sa.Integer(), nullable=True),
+        sa.Column("kind", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["reminder_id"], ["custom_reminder.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_reminder_event_user_created", "reminder_event", ["user_id", "created_at"], unique=False)
+    op.create_index("ix_reminder_event_reminder_created", "reminder_event", ["reminder_id", "created_at"], unique=False)
+    for column in ("reminders_sent", "reminders_failed", "reminders_done"):
+        op.add_column("daily_global_stats", sa.Column(column, sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    for column in ("reminders_done", "reminders_failed", "reminders_sent"):
+        op.drop_column("daily_global_stats", column)
+    op.drop_index("ix_reminder_event_reminder_created", table_name="reminder_event")
+    op.drop_index("ix_reminder_event_user_created", table_name="reminder_event")
+    op.drop_table("reminder_event")
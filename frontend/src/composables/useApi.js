@@ -31,6 +31,10 @@ export function useApi() {
     post: (path, body) => request(path, { method: 'POST', body }),
     put: (path, body) => request(path, { method: 'PUT', body }),
     delete: (path) => request(path, { method: 'DELETE' }),
+    // Первый экран одним запросом: today, settings, stats, reminders, reminder_stats
+    bootstrap: () => request('/api/bootstrap'),
+    // Одноразовый токен для /api/events (в URL не передаём initData)
+    eventsToken: () => request('/api/events/token', { method: 'POST' }),
   }
 
   return { api }
@@ -0,0 +1,70 @@
+import { onBeforeUnmount } from 'vue'
+import { useApi } from './useApi'
+
+const RECONNECT_DELAY_MS = 5000
+
+// Подписка на /api/events (SSE): сервер присылает `change` с { kinds, days },
+// когда план, статусы, настройки или напоминания пользователя изменились (в боте или в другом окне).
+// Поток открывается по одноразовому токену: initData не попадает в URL и логи.
+export function useLiveUpdates() {
+  const { api } = useApi()
+  let source = null
+  let reconnectTimer = null
+  let active = false
+
+  async function connect(onChange) {
+    let token
+    try {
+      ;({ token } = await api.eventsToken())
+    } catch (_) {
+      scheduleReconnect(onChange)
+      return
+    }
+    if (!active) return
+    source = new EventSource(`/api/events?token=${encodeURIComponent(token)}`)
+    source.addEventListener('change', (e) => {
+      try {
+        onChange(JSON.parse(e.data))
+      } catch (_) {}
+    })
+    // Токен одноразовый: встроенный реконнект EventSource с тем же URL не пройдёт, поэтому
+    // закрываем поток и подключаемся заново с новым токеном.
+    source.onerror = () => {
+      closeSource()
+      scheduleReconnect(onChange)
+    }
+  }
+
+  function scheduleReconnect(onChange) {
+    if (!active || reconnectTimer) return
+    reconnectTimer = setTimeout(() => {
+      reconnectTimer = null
+      if (active) connect(onChange)
+    }, RECONNECT_DELAY_MS)
+  }
+
+  function closeSource() {
+    if (source) {
+      source.close()
+      source = null
+    }
+  }
+
+  function subscribe(onChange) {
+    if (typeof EventSource === 'undefined') return
+    unsubscribe()
+    active = true
+    connect(onChange)
+  }
+
+  function unsubscribe() {
+    active = false
+    clearTimeout(reconnectTimer)
+    reconnectTimer = null
+    closeSource()
+  }
+
+  onBeforeUnmount(unsubscribe)
+
+  return { subscribe, unsubscribe }
+}
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Write .gz (and .br, if the brotli package is installed) next to compressible static files,
+so PrecompressedStaticFiles (src/api/static.py) can serve them without compressing per request.
+
+Usage: python scripts/precompress.py [DIR ...]   (default: static)
+Run after the frontend build; safe to re-run (variants are rewritten).
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants only
+    brotli = None
+
+COMPRESSIBLE_SUFFIXES = {".js", ".mjs", ".css", ".html", ".svg", ".json", ".map", ".txt", ".xml", ".ico"}
+MIN_SIZE = 1024
+
+
+def compress_file(path: Path) -> list[Path]:
+    """Write variants of path that are smaller than the original; return their paths."""
+    data = path.read_bytes()
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    written = []
+    for suffix, compressed in variants:
+        target = path.with_name(path.name + suffix)
+        if len(compressed) < len(data):
+            target.write_bytes(compressed)
+            written.append(target)
+        else:
+            target.unlink(missing_ok=True)
+    return written
+
+
+def precompress(root: Path) -> int:
+    count = 0
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix in COMPRESSIBLE_SUFFIXES and path.stat().st_size >= MIN_SIZE:
+            count += len(compress_file(path))
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("dirs", nargs="*", default=["static"], type=Path)
+    args = parser.parse_args()
+    for root in args.dirs:
+        print(f"{root}: {precompress(root)} compressed variants written")
+    if brotli is None:
+        print("brotli is not installed: only gzip variants were written")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 """FastAPI routers."""
+from src.api.admin import router as admin_api_router
 from src.api.webapp import router as webapp_api_router
 
-__all__ = ["webapp_api_router"]
+__all__ = ["admin_api_router", "webapp_api_router"]
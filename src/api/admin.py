@@ -0,0 +1,42 @@
+"""Admin API: operator analytics from precomputed daily_global_stats rows."""
+from __future__ import annotations
+
+from datetime import date, timedelta
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import get_settings
+from src.db.session import get_async_session
+from src.services.global_stats import get_global_stats, serialize_global_stats
+
+MAX_ADMIN_RANGE_DAYS = 366
+
+
+def require_admin_token(x_admin_token: str = Header(default="", alias="X-Admin-Token")) -> None:
+    expected = get_settings().admin_api_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/stats")
+async def admin_stats(
+    date_from: date | None = Query(default=None, alias="from"),
+    date_to: date | None = Query(default=None, alias="to"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Daily global stats (default: the last 30 days). Reads only rollup rows, never plan/task."""
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if (date_to - date_from).days >= MAX_ADMIN_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_ADMIN_RANGE_DAYS} days")
+    rows = await get_global_stats(session, date_from, date_to)
+    return {"from": date_from.isoformat(), "to": date_to.isoformat(), "days": [serialize_global_stats(r) for r in rows]}
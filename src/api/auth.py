@@ -1,23 +1,27 @@
 """Telegram WebApp auth helpers and dependencies."""
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 import hashlib
 import hmac
 import json
+import secrets
 from urllib.parse import parse_qsl
 
-from fastapi import Depends, Header, HTTPException
+from fastapi import Depends, Header, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config import Settings
-from src.db.models import User
+from src.config import get_settings
 from src.db.session import get_async_session
-from src.services.user import get_or_create_user, get_user_by_telegram_id
+from src.services.cache import get_redis
+from src.services.user import get_or_create_user, get_user_snapshot
+from src.services.user_cache import UserSnapshot
 
 
-@dataclass
+@dataclass(frozen=True)
 class WebAppAuthPayload:
     user_id: int
     auth_date: int
@@ -25,7 +29,69 @@ class WebAppAuthPayload:
     raw: dict[str, str]
 
 
-def validate_webapp_init_data(init_data: str, bot_token: str, max_age_seconds: int = 24 * 3600) -> WebAppAuthPayload:
+INIT_DATA_CACHE_SIZE = 1024
+DEFAULT_INIT_DATA_MAX_AGE = 24 * 3600
+STREAM_TOKEN_KEY = "events_token:{token}"
+STREAM_TOKEN_TTL_SECONDS = 60
+
+
+@lru_cache(maxsize=8)
+def _webapp_secret_key(bot_token: str) -> bytes:
+    """HMAC key for initData checks; depends only on the bot token, so derive it once."""
+    return hmac.new(b"WebAppData", bot_token.encode("utf-8"), hashlib.sha256).digest()
+
+
+class VerifiedInitDataCache:
+    """
+    Bounded LRU of verified initData payloads, each valid until auth_date + max_age.
+    Keys are a digest of the whole initData string (and token), so only byte-identical strings hit.
+    """
+
+    def __init__(self, maxsize: int = INIT_DATA_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, tuple[WebAppAuthPayload, int]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(init_data: str, bot_token: str, max_age_seconds: int) -> bytes:
+        return hashlib.sha256(f"{bot_token}\0{max_age_seconds}\0{init_data}".encode("utf-8")).digest()
+
+    def get(self, key: bytes, now_ts: int) -> WebAppAuthPayload | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < now_ts:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: bytes, payload: WebAppAuthPayload, expires_at: int) -> None:
+        self._entries[key] = (payload, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+init_data_cache = VerifiedInitDataCache()
+
+
+def _verify_init_data(init_data: str, bot_token: str, max_age_seconds: int, now_ts: int) -> WebAppAuthPayload:
     pairs = dict(parse_qsl(init_data, keep_blank_values=True))
     received_hash = pairs.get("hash")
     if not received_hash:
@@ -34,7 +100,7 @@ def validate_webapp_init_data(init_data: str, bot_token: str, max_age_seconds: i
     data_check_parts = [f"{k}={v}" for k, v in sorted(pairs.items()) if k != "hash"]
     data_check_string = "\n".join(data_check_parts)
 
-    secret_key = hmac.new(b"WebAppData", bot_token.encode("utf-8"), hashlib.sha256).digest()
+    secret_key = _webapp_secret_key(bot_token)
     calc_hash = hmac.new(secret_key, data_check_string.encode("utf-8"), hashlib.sha256).hexdigest()
     if not hmac.compare_digest(calc_hash, received_hash):
         raise ValueError("Invalid initData signature")
@@ -43,7 +109,6 @@ def validate_webapp_init_data(init_data: str, bot_token: str, max_age_seconds: i
     if not auth_date_raw or not auth_date_raw.isdigit():
         raise ValueError("Invalid auth_date")
     auth_date = int(auth_date_raw)
-    now_ts = int(datetime.now(timezone.utc).timestamp())
     if now_ts - auth_date > max_age_seconds:
         raise ValueError("initData expired")
 
@@ -66,21 +131,31 @@ def validate_webapp_init_data(init_data: str, bot_token: str, max_age_seconds: i
     )
 
 
-async def get_webapp_user(
-    x_telegram_init_data: str = Header(default="", alias="X-Telegram-Init-Data"),
-    session: AsyncSession = Depends(get_async_session),
-) -> User:
-    if not x_telegram_init_data:
-        raise HTTPException(status_code=401, detail="Missing X-Telegram-Init-Data header")
-    settings = Settings()
+def validate_webapp_init_data(
+    init_data: str,
+    bot_token: str,
+    max_age_seconds: int = DEFAULT_INIT_DATA_MAX_AGE,
+) -> WebAppAuthPayload:
+    """Verify initData (signature, age, user); successful results are cached until they expire."""
+    now_ts = int(datetime.now(timezone.utc).timestamp())
+    key = init_data_cache.key(init_data, bot_token, max_age_seconds)
+    payload = init_data_cache.get(key, now_ts)
+    if payload is None:
+        payload = _verify_init_data(init_data, bot_token, max_age_seconds, now_ts)
+        init_data_cache.put(key, payload, payload.auth_date + max_age_seconds)
+    return payload
+
+
+async def _authenticate(init_data: str, session: AsyncSession) -> UserSnapshot:
+    settings = get_settings()
     try:
-        payload = validate_webapp_init_data(x_telegram_init_data, settings.telegram_bot_token)
+        payload = validate_webapp_init_data(init_data, settings.telegram_bot_token)
     except ValueError as exc:
         raise HTTPException(status_code=401, detail=str(exc)) from exc
 
-    user = await get_user_by_telegram_id(session, payload.user_id)
+    user = await get_user_snapshot(session, payload.user_id)
     if not user:
-        user = await get_or_create_user(session, payload.user_id)
+        user = UserSnapshot.from_user(await get_or_create_user(session, payload.user_id))
         
     if not user.onboarding_tz_confirmed or not user.onboarding_morning_confirmed or not user.onboarding_evening_confirmed:
         raise HTTPException(
@@ -89,3 +164,35 @@ async def get_webapp_user(
         )
         
     return user
+
+
+async def get_webapp_user(
+    x_telegram_init_data: str = Header(default="", alias="X-Telegram-Init-Data"),
+    session: AsyncSession = Depends(get_async_session),
+) -> UserSnapshot:
+    if not x_telegram_init_data:
+        raise HTTPException(status_code=401, detail="Missing X-Telegram-Init-Data header")
+    return await _authenticate(x_telegram_init_data, session)
+
+
+async def issue_stream_token(user_id: int) -> str:
+    """Single-use token for /api/events, so the signed initData never goes into a URL (and access logs)."""
+    token = secrets.token_urlsafe(24)
+    try:
+        await get_redis().set(STREAM_TOKEN_KEY.format(token=token), user_id, ex=STREAM_TOKEN_TTL_SECONDS)
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail="Live updates unavailable") from exc
+    return token
+
+
+async def get_stream_user_id(token: str = Query(default="")) -> int:
+    """User id behind a ?token= from issue_stream_token; the token is consumed (EventSource cannot send headers)."""
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing token")
+    try:
+        user_id = await get_redis().getdel(STREAM_TOKEN_KEY.format(token=token))
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail="Live updates unavailable") from exc
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return int(user_id)
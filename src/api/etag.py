@@ -0,0 +1,63 @@
+"""Conditional GET for per-user WebApp reads, keyed by the user's data version.
+
+Every mutation bumps the version (src.services.changes), so an ETag derived from it changes
+whenever the underlying data may have changed. The check runs as a route dependency right after
+auth (which is served from the initData and user snapshot caches), before the endpoint reads the DB.
+"""
+from __future__ import annotations
+
+from datetime import date
+import hashlib
+import logging
+
+from fastapi import Depends, Header, HTTPException, Request, Response
+
+from src.api.auth import get_webapp_user
+from src.services.cache import get_data_version
+from src.services.user_cache import UserSnapshot
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(user_id: int, version: int, name: str, day: date, query: str = "") -> str:
+    """Strong ETag; the day is part of it because "today" and streaks roll over without a mutation."""
+    raw = f"{user_id}\0{version}\0{name}\0{day.isoformat()}\0{query}"
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def data_etag(name: str):
+    """
+    Route dependency: answer 304 if If-None-Match carries the current ETag of `name`,
+    otherwise put the ETag on the response. Without Redis it does nothing.
+    """
+
+    async def dependency(
+        request: Request,
+        response: Response,
+        user: UserSnapshot = Depends(get_webapp_user),
+        if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    ) -> None:
+        try:
+            version = await get_data_version(user.id)
+        except Exception as e:
+            logger.warning("Data version lookup failed for user_id=%s: %s", user.id, e)
+            return
+        etag = make_etag(user.id, version, name, date.today(), request.url.query)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return dependency
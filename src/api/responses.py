@@ -0,0 +1,28 @@
+"""orjson-backed JSON responses (the app's default response class)."""
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+
+def dump_json(content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class OrjsonResponse(JSONResponse):
+    """Serializes dicts, lists, dataclasses (incl. slotted), dates and datetimes natively."""
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def orjson_response(content: Any, response: Response | None = None) -> OrjsonResponse:
+    """
+    Return `content` without FastAPI's jsonable_encoder pass. Headers that dependencies put on the
+    injected `response` (ETag, Cache-Control) are carried over.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return OrjsonResponse(content, headers=headers)
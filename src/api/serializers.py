@@ -0,0 +1,66 @@
+"""Typed row objects for WebApp responses; orjson serializes them without an intermediate dict."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from src.services.stats import HistoryDay
+
+
+@dataclass(slots=True)
+class TaskItem:
+    id: int
+    position: int
+    text: str
+    status: str | None
+    comment: str | None
+
+    @classmethod
+    def from_task(cls, task) -> TaskItem:
+        status = task.status
+        return cls(
+            task.id,
+            task.position,
+            task.text,
+            status.status_enum if status else None,
+            status.comment if status else None,
+        )
+
+
+@dataclass(slots=True)
+class ReminderItem:
+    id: int
+    time_of_day: str  # HH:MM
+    description: str
+    repeat_interval_minutes: int
+    max_attempts_per_day: int
+    day_of_month: int | None
+    enabled: bool
+    done_today: bool
+    attempts_sent_today: int
+
+    @classmethod
+    def from_row(cls, row) -> ReminderItem:
+        """From a CustomReminder or a row of src.services.reminders.REMINDER_LIST_COLUMNS."""
+        return cls(
+            row.id,
+            row.time_of_day.strftime("%H:%M"),
+            row.description,
+            row.repeat_interval_minutes,
+            row.max_attempts_per_day,
+            row.day_of_month,
+            row.enabled,
+            row.done_today,
+            row.attempts_sent_today,
+        )
+
+
+@dataclass(slots=True)
+class HistoryItem:
+    date: date
+    done: int
+    total: int
+    percent: int
+
+    @classmethod
+    def from_day(cls, day: HistoryDay) -> HistoryItem:
+        return cls(day.date, int(day.done), day.total, day.percent)
@@ -0,0 +1,167 @@
+"""Static serving: precompressed variants, immutable caching of hashed assets, in-memory HTML pages.
+
+Compressed variants (`<file>.br`, `<file>.gz`) are produced at build time by scripts/precompress.py.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import stat
+from dataclasses import dataclass
+from mimetypes import guess_type
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from src.api.etag import etag_matches
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Preference order when the client accepts several.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def accepted_encodings(header: str | None) -> set[str]:
+    """Content codings of an Accept-Encoding header with q > 0 ("*" stands for all of ENCODINGS)."""
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding)
+    if "*" in accepted:
+        accepted.update(encoding for encoding, _suffix in ENCODINGS)
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves a build-time .br/.gz variant when the client accepts it.
+    Files under `immutable_prefixes` (content-hashed build output) are cacheable for a year;
+    everything else must be revalidated (ETag / Last-Modified).
+    """
+
+    def __init__(self, *args, immutable_prefixes: tuple[str, ...] = (), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_prefixes = tuple(os.path.normpath(prefix) + os.sep for prefix in immutable_prefixes)
+        # (full_path, mtime_ns) -> [(encoding, variant_path, variant_stat)]; files only change on deploy.
+        self._variants: dict[tuple[str, int], list[tuple[str, str, os.stat_result]]] = {}
+
+    def _find_variants(self, full_path: str, stat_result: os.stat_result) -> list[tuple[str, str, os.stat_result]]:
+        key = (full_path, stat_result.st_mtime_ns)
+        variants = self._variants.get(key)
+        if variants is None:
+            variants = []
+            for encoding, suffix in ENCODINGS:
+                try:
+                    variant_stat = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                if stat.S_ISREG(variant_stat.st_mode):
+                    variants.append((encoding, full_path + suffix, variant_stat))
+            self._variants[key] = variants
+        return variants
+
+    def _cache_control(self, scope: Scope) -> str:
+        path = self.get_path(scope)
+        if self.immutable_prefixes and path.startswith(self.immutable_prefixes):
+            return IMMUTABLE_CACHE_CONTROL
+        return REVALIDATE_CACHE_CONTROL
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+        headers = {"Cache-Control": self._cache_control(scope)}
+        variants = self._find_variants(full_path, stat_result)
+        response = None
+        if variants:
+            headers["Vary"] = "Accept-Encoding"
+            accepted = accepted_encodings(request_headers.get("accept-encoding"))
+            for encoding, variant_path, variant_stat in variants:
+                if encoding in accepted:
+                    response = FileResponse(
+                        variant_path,
+                        status_code=status_code,
+                        stat_result=variant_stat,
+                        media_type=guess_type(full_path)[0] or "text/plain",
+                        headers={**headers, "Content-Encoding": encoding},
+                    )
+                    break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+@dataclass(frozen=True, slots=True)
+class _Representation:
+    body: bytes
+    etag: str
+
+
+class InMemoryPage:
+    """
+    An HTML page read from the first existing candidate path once, then served from memory
+    (with gzip/brotli variants computed up front and a content-hash ETag) until the process restarts.
+    """
+
+    def __init__(self, *candidates: Path, media_type: str = "text/html"):
+        self.candidates = candidates
+        self.media_type = media_type
+        self._representations: dict[str, _Representation] | None = None
+
+    def load(self) -> None:
+        path = next((p for p in self.candidates if p.is_file()), None)
+        if path is None:
+            raise FileNotFoundError(f"None of {[str(p) for p in self.candidates]} exists")
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        representations = {"identity": _Representation(data, f'"{digest}"')}
+        encoded = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            encoded["br"] = brotli.compress(data, quality=11)
+        for encoding, body in encoded.items():
+            if len(body) < len(data):
+                representations[encoding] = _Representation(body, f'"{digest}-{encoding}"')
+        self._representations = representations
+
+    def response(self, request: Request) -> Response:
+        if self._representations is None:
+            self.load()
+        accepted = accepted_encodings(request.headers.get("accept-encoding"))
+        encoding = next(
+            (enc for enc, _suffix in ENCODINGS if enc in accepted and enc in self._representations),
+            "identity",
+        )
+        representation = self._representations[encoding]
+        headers = {"ETag": representation.etag, "Cache-Control": REVALIDATE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), representation.etag):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(representation.body, media_type=self.media_type, headers=headers)
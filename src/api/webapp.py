@@ -1,40 +1,62 @@
-"""WebApp API: today, tasks, settings, history, stats."""
+"""WebApp API: bootstrap, today, tasks, settings, history, stats."""
 from __future__ import annotations
 
-from datetime import date, datetime, time
+import asyncio
+from datetime import date, datetime, time, timedelta
+import hashlib
+import json
 import re
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from src.api.auth import get_webapp_user
-from src.db.models import Plan, Task, User
+from src.api.auth import STREAM_TOKEN_TTL_SECONDS, get_stream_user_id, get_webapp_user, issue_stream_token
+from src.api.etag import data_etag, etag_matches
+from src.api.responses import dump_json, orjson_response
+from src.api.serializers import HistoryItem, ReminderItem, TaskItem
+from src.db.models import Plan
 from src.db.session import get_async_session
-from src.services.evening import DONE, FAILED, PARTIAL, set_task_status, update_task_comment
+from src.logic.analytics import dense_series, heatmap
+from src.services.day_bitmap import cell_for, get_day_cells
+from src.services.events import event_broker
+from src.services.evening import DONE, FAILED, PARTIAL, set_plan_statuses, set_task_status, update_task_comment
+from src.services.export import EXPORT_FORMATS, MEDIA_TYPES, stream_export
+from src.services.history_cache import HTTP_MAX_AGE_SECONDS, cached_month, is_immutable_month
 from src.services.plan import save_plan
 from src.services.reminders import (
     add_custom_reminder,
-    list_custom_reminders,
+    list_reminder_rows,
     get_custom_reminder,
     get_reminder_stats,
+    get_reminder_history,
+    default_stats_range,
     update_custom_reminder,
     delete_custom_reminder,
     toggle_custom_reminder,
     mark_reminder_done_today,
 )
-from src.services.stats import get_history, get_stats, get_today_plan
+from src.services.stats import (
+    MAX_HISTORY_RANGE_DAYS,
+    HistoryDay,
+    get_history,
+    get_history_range,
+    get_stats,
+    get_today_plan,
+    month_bounds,
+)
 from src.services.user import (
     update_morning_reminder_settings,
     update_notify_times,
     update_user_timezone,
 )
+from src.services.user_cache import UserSnapshot
 
 router = APIRouter(prefix="/api", tags=["webapp"])
 VALID_STATUSES = {DONE, PARTIAL, FAILED}
+EVENTS_KEEPALIVE_SECONDS = 25
 
 
 class TaskStatusUpdatePayload(BaseModel):
@@ -42,6 +64,16 @@ class TaskStatusUpdatePayload(BaseModel):
     comment: str | None = None
 
 
+class PlanStatusItem(BaseModel):
+    task_id: int
+    status: str
+    comment: str | None = None
+
+
+class PlanStatusesPayload(BaseModel):
+    items: list[PlanStatusItem] = Field(min_length=1, max_length=200)
+
+
 class SettingsUpdatePayload(BaseModel):
     timezone: str | None = None
     morning_time: str | None = None
@@ -89,34 +121,25 @@ def _parse_hhmm(value: str) -> time:
 
 def _serialize_today(plan: Plan | None) -> dict:
     if not plan or not plan.tasks:
-        return {"date": date.today().isoformat(), "tasks": [], "exists": False}
-    tasks = []
-    for task in sorted(plan.tasks, key=lambda x: x.position):
-        tasks.append(
-            {
-                "id": task.id,
-                "position": task.position,
-                "text": task.text,
-                "status": task.status.status_enum if task.status else None,
-                "comment": task.status.comment if task.status else None,
-            }
-        )
-    return {"date": plan.date.isoformat(), "tasks": tasks, "exists": True, "plan_id": plan.id}
+        return {"date": date.today(), "tasks": [], "exists": False}
+    tasks = [TaskItem.from_task(task) for task in sorted(plan.tasks, key=lambda x: x.position)]
+    return {"date": plan.date, "tasks": tasks, "exists": True, "plan_id": plan.id}
 
 
-@router.get("/today")
+@router.get("/today", dependencies=[Depends(data_etag("today"))])
 async def api_today(
-    user: User = Depends(get_webapp_user),
+    response: Response,
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
     plan = await get_today_plan(session, user.id)
-    return _serialize_today(plan)
+    return orjson_response(_serialize_today(plan), response)
 
 
 @router.post("/plan/today")
 async def api_create_today_plan(
     payload: CreateTodayPlanPayload,
-    user: User = Depends(get_webapp_user),
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
     cleaned = [x.strip()[:500] for x in payload.tasks if x and x.strip()]
@@ -130,38 +153,56 @@ async def api_create_today_plan(
 async def api_set_task_status(
     task_id: int,
     payload: TaskStatusUpdatePayload,
-    user: User = Depends(get_webapp_user),
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
-    r = await session.execute(
-        select(Task)
-        .join(Plan, Plan.id == Task.plan_id)
-        .where(Task.id == task_id, Plan.user_id == user.id)
-        .options(selectinload(Task.status))
-    )
-    task = r.scalar_one_or_none()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
     if payload.status is not None:
         if payload.status not in VALID_STATUSES:
             raise HTTPException(status_code=400, detail="Invalid status")
-        await set_task_status(
+        ts = await set_task_status(
             session,
-            task_id=task.id,
+            task_id=task_id,
             status_enum=payload.status,
             comment=(payload.comment or "")[:500] if payload.comment is not None else None,
+            user_id=user.id,
         )
     elif payload.comment is not None:
-        await update_task_comment(session, task_id=task.id, comment=(payload.comment or "")[:500] or None)
+        ts = await update_task_comment(
+            session, task_id=task_id, comment=(payload.comment or "")[:500] or None, user_id=user.id
+        )
     else:
         raise HTTPException(status_code=400, detail="Provide status or comment")
+    if not ts:
+        raise HTTPException(status_code=404, detail="Task not found")
 
     return {"ok": True}
 
 
-@router.get("/settings")
-async def api_get_settings(user: User = Depends(get_webapp_user)):
+@router.put("/plan/{plan_id}/statuses")
+async def api_set_plan_statuses(
+    plan_id: int,
+    payload: PlanStatusesPayload,
+    user: UserSnapshot = Depends(get_webapp_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Set statuses (and optional comments) of several tasks of one plan in one transaction."""
+    if any(item.status not in VALID_STATUSES for item in payload.items):
+        raise HTTPException(status_code=400, detail="Invalid status")
+    updated = await set_plan_statuses(
+        session,
+        plan_id,
+        [
+            (item.task_id, item.status, item.comment[:500] if item.comment is not None else None)
+            for item in payload.items
+        ],
+        user_id=user.id,
+    )
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Plan not found")
+    return {"ok": True, "updated": updated}
+
+
+def _serialize_settings(user: UserSnapshot) -> dict:
     return {
         "timezone": user.timezone,
         "morning_time": user.notify_morning_time.strftime("%H:%M"),
@@ -171,10 +212,15 @@ async def api_get_settings(user: User = Depends(get_webapp_user)):
     }
 
 
+@router.get("/settings", dependencies=[Depends(data_etag("settings"))])
+async def api_get_settings(user: UserSnapshot = Depends(get_webapp_user)):
+    return _serialize_settings(user)
+
+
 @router.put("/settings")
 async def api_update_settings(
     payload: SettingsUpdatePayload,
-    user: User = Depends(get_webapp_user),
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
     if payload.timezone is not None:
@@ -197,18 +243,57 @@ async def api_update_settings(
     return {"ok": True}
 
 
-@router.get("/stats")
+@router.get("/stats", dependencies=[Depends(data_etag("stats"))])
 async def api_stats(
-    user: User = Depends(get_webapp_user),
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
     return await get_stats(session, user.id)
 
 
+@router.get("/stats/heatmap")
+async def api_stats_heatmap(
+    date_from: date | None = Query(default=None, alias="from"),
+    date_to: date | None = Query(default=None, alias="to"),
+    user: UserSnapshot = Depends(get_webapp_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Per-day completion heatmap with trends (default: the last 365 days). Arrays are indexed by day from `from`."""
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=364)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if (date_to - date_from).days >= MAX_HISTORY_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_HISTORY_RANGE_DAYS} days")
+    days = await get_history_range(session, user.id, date_from, date_to)
+    return heatmap(days, date_from, date_to)
+
+
+@router.get("/calendar")
+async def api_calendar(
+    month: str | None = Query(default=None),
+    user: UserSnapshot = Depends(get_webapp_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Day cells for a month (?month=YYYY-MM, default current): 0 = no plan, 1 = partial, 2 = 100%."""
+    month = month or datetime.now().strftime("%Y-%m")
+    if not re.fullmatch(r"\d{4}-\d{2}", month):
+        raise HTTPException(status_code=400, detail="Month must be YYYY-MM")
+    year, mm = (int(part) for part in month.split("-"))
+    if not (1 <= mm <= 12):
+        raise HTTPException(status_code=400, detail="Month out of range")
+    first, last = month_bounds(year, mm)
+    cells = await get_day_cells(session, user.id, first, last)
+    if cells is None:
+        percent, _done, _total = dense_series(await get_history_range(session, user.id, first, last), first, last)
+        cells = [cell_for(p) for p in percent]
+    return {"month": month, "from": first.isoformat(), "cells": cells}
+
+
 @router.post("/timezone/detect")
 async def api_timezone_detect(
     payload: TimezoneDetectPayload,
-    user: User = Depends(get_webapp_user),
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
     """Save timezone detected from browser."""
@@ -220,40 +305,59 @@ async def api_timezone_detect(
     return {"ok": True, "timezone": payload.timezone}
 
 
+def _reminder_stats_range(date_from: date | None, date_to: date | None) -> tuple[date, date]:
+    default_from, default_to = default_stats_range()
+    date_to = date_to or default_to
+    date_from = date_from or date_to - (default_to - default_from)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if (date_to - date_from).days >= MAX_HISTORY_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_HISTORY_RANGE_DAYS} days")
+    return date_from, date_to
+
+
 @router.get("/reminders/stats")
 async def api_reminders_stats(
-    user: User = Depends(get_webapp_user),
+    date_from: date | None = Query(default=None, alias="from"),
+    date_to: date | None = Query(default=None, alias="to"),
+    user: UserSnapshot = Depends(get_webapp_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Current counters plus sent/done/completion rates (total and per reminder) for ?from=&to= (UTC, default 30 days)."""
+    first, last = _reminder_stats_range(date_from, date_to)
+    return await get_reminder_stats(session, user.id, first, last)
+
+
+@router.get("/reminders/{reminder_id}/stats")
+async def api_reminder_detail_stats(
+    reminder_id: int,
+    date_from: date | None = Query(default=None, alias="from"),
+    date_to: date | None = Query(default=None, alias="to"),
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
-    return await get_reminder_stats(session, user.id)
+    """Per-day delivery history of one reminder."""
+    first, last = _reminder_stats_range(date_from, date_to)
+    history = await get_reminder_history(session, reminder_id, user.id, first, last)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Reminder not found")
+    return history
 
 
-@router.get("/reminders")
+@router.get("/reminders", dependencies=[Depends(data_etag("reminders"))])
 async def api_reminders_list(
-    user: User = Depends(get_webapp_user),
+    response: Response,
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
-    reminders = await list_custom_reminders(session, user.id)
-    return [
-        {
-            "id": r.id,
-            "time_of_day": r.time_of_day.strftime("%H:%M"),
-            "description": r.description,
-            "repeat_interval_minutes": r.repeat_interval_minutes,
-            "max_attempts_per_day": r.max_attempts_per_day,
-            "day_of_month": r.day_of_month,
-            "enabled": r.enabled,
-            "done_today": r.done_today,
-            "attempts_sent_today": r.attempts_sent_today,
-        }
-        for r in reminders
-    ]
+    rows = await list_reminder_rows(session, user.id)
+    return orjson_response([ReminderItem.from_row(row) for row in rows], response)
 
 
 @router.post("/reminders")
 async def api_reminders_create(
     payload: CreateReminderPayload,
-    user: User = Depends(get_webapp_user),
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
     t = _parse_hhmm(payload.time_of_day)
@@ -282,7 +386,7 @@ async def api_reminders_create(
 async def api_reminders_update(
     reminder_id: int,
     payload: ReminderUpdatePayload,
-    user: User = Depends(get_webapp_user),
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
     reminder = await get_custom_reminder(session, reminder_id)
@@ -319,7 +423,7 @@ async def api_reminders_update(
 @router.delete("/reminders/{reminder_id}")
 async def api_reminders_delete(
     reminder_id: int,
-    user: User = Depends(get_webapp_user),
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
     deleted = await delete_custom_reminder(session, reminder_id, user.id)
@@ -329,28 +433,144 @@ async def api_reminders_delete(
     return {"ok": True}
 
 
-@router.get("/history")
+def _serialize_history(items: list[HistoryDay]) -> list[HistoryItem]:
+    return [HistoryItem.from_day(day) for day in items]
+
+
+@router.get("/history", dependencies=[Depends(data_etag("history"))])
 async def api_history(
-    month: str = Query(default_factory=lambda: datetime.now().strftime("%Y-%m")),
-    user: User = Depends(get_webapp_user),
+    response: Response,
+    month: str | None = Query(default=None),
+    date_from: date | None = Query(default=None, alias="from"),
+    date_to: date | None = Query(default=None, alias="to"),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    user: UserSnapshot = Depends(get_webapp_user),
     session: AsyncSession = Depends(get_async_session),
 ):
+    """
+    History for a calendar month (?month=YYYY-MM, default current) or an arbitrary range (?from=&to=).
+    Months that are over are served from a long-lived cache with long HTTP caching.
+    """
+    if date_from is not None or date_to is not None:
+        if date_from is None or date_to is None:
+            raise HTTPException(status_code=400, detail="Provide both from and to")
+        if date_from > date_to:
+            raise HTTPException(status_code=400, detail="from must not be after to")
+        if (date_to - date_from).days >= MAX_HISTORY_RANGE_DAYS:
+            raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_HISTORY_RANGE_DAYS} days")
+        items = await get_history_range(session, user.id, date_from, date_to)
+        return orjson_response({"from": date_from, "to": date_to, "items": _serialize_history(items)}, response)
+
+    month = month or datetime.now().strftime("%Y-%m")
     if not re.fullmatch(r"\d{4}-\d{2}", month):
         raise HTTPException(status_code=400, detail="Month must be YYYY-MM")
     year, mm = month.split("-")
     year_int, month_int = int(year), int(mm)
     if not (1 <= month_int <= 12):
         raise HTTPException(status_code=400, detail="Month out of range")
+    if is_immutable_month(year_int, month_int):
+        return await _immutable_month_response(session, user.id, year_int, month_int, if_none_match)
     items = await get_history(session, user.id, year_int, month_int)
-    data = []
-    for plan, done, total in items:
-        percent = int(round((100 * done / total))) if total else 0
-        data.append(
-            {
-                "date": plan.date.isoformat(),
-                "done": done,
-                "total": total,
-                "percent": percent,
-            }
-        )
-    return {"month": month, "items": data}
+    return orjson_response({"month": month, "items": _serialize_history(items)}, response)
+
+
+async def _immutable_month_response(
+    session: AsyncSession, user_id: int, year: int, month: int, if_none_match: str | None
+) -> Response:
+    month_str = f"{year:04d}-{month:02d}"
+
+    async def render() -> bytes:
+        first, last = month_bounds(year, month)
+        items = await get_history_range(session, user_id, first, last)
+        return dump_json({"month": month_str, "items": _serialize_history(items)})
+
+    body = await cached_month(user_id, month_str, render)
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={HTTP_MAX_AGE_SECONDS}"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/export")
+async def api_export(
+    fmt: str = Query(default="csv", alias="format"),
+    user: UserSnapshot = Depends(get_webapp_user),
+):
+    """Full history (plans, tasks, statuses, comments) as a streamed CSV or NDJSON download."""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    filename = f"plans-{date.today().isoformat()}.{fmt}"
+    return StreamingResponse(
+        stream_export(user.id, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/bootstrap", dependencies=[Depends(data_etag("bootstrap"))])
+async def api_bootstrap(
+    response: Response,
+    user: UserSnapshot = Depends(get_webapp_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Everything the first screen needs (today, settings, stats, reminders, reminder stats) in one round trip.
+    Reads share one session, so they run one after another; stats come from the Redis cache when warm.
+    """
+    first, last = default_stats_range()
+    today = _serialize_today(await get_today_plan(session, user.id))
+    stats = await get_stats(session, user.id)
+    reminders = await list_reminder_rows(session, user.id)
+    reminder_stats = await get_reminder_stats(session, user.id, first, last)
+    return orjson_response(
+        {
+            "today": today,
+            "settings": _serialize_settings(user),
+            "stats": stats,
+            "reminders": [ReminderItem.from_row(row) for row in reminders],
+            "reminder_stats": reminder_stats,
+        },
+        response,
+    )
+
+
+async def _event_stream(user_id: int):
+    """SSE chunks for one subscriber; ends when the broker closes on shutdown (the client reconnects elsewhere)."""
+    if event_broker.closed:
+        return
+    queue = event_broker.subscribe(user_id)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            data = {"kinds": event.get("kinds", []), "days": event.get("days", [])}
+            yield f"event: change\ndata: {json.dumps(data)}\n\n"
+    finally:
+        event_broker.unsubscribe(user_id, queue)
+
+
+@router.post("/events/token")
+async def api_events_token(user: UserSnapshot = Depends(get_webapp_user)):
+    """Single-use token for GET /api/events, valid for a minute."""
+    return {"token": await issue_stream_token(user.id), "expires_in": STREAM_TOKEN_TTL_SECONDS}
+
+
+@router.get("/events")
+async def api_events(user_id: int = Depends(get_stream_user_id)):
+    """
+    Server-sent `change` events ({"kinds": [...], "days": [...]}) whenever the user's plans, statuses,
+    settings or reminders change, from any replica. Authenticated by ?token= from POST /api/events/token
+    (EventSource cannot set headers); a reconnect needs a new token.
+    """
+    return StreamingResponse(
+        _event_stream(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
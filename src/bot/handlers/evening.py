@@ -12,13 +12,14 @@ from src.bot.text import format_evening_plan, EVENING_AFTER_STATUSES, EVENING_DA
 from src.services.evening import (
     set_task_status,
     get_completion_for_plan,
+    mark_plan_done,
     update_task_comment,
     DONE,
     PARTIAL,
     FAILED,
 )
-from src.services.plan import get_plan_by_id, get_task_with_plan
-from src.services.user import get_user_by_telegram_id
+from src.services.plan import get_plan_by_id, get_plan_for_task, get_task_with_plan
+from src.services.user import get_user_snapshot
 
 router = Router()
 
@@ -53,20 +54,42 @@ async def set_status_callback(callback: CallbackQuery, session: AsyncSession, st
     if not telegram_id:
         await callback.answer("Ошибка")
         return
-    user = await get_user_by_telegram_id(session, telegram_id)
-    task = await get_task_with_plan(session, task_id)
-    if not user or not task or not task.plan or task.plan.user_id != user.id:
+    user = await get_user_snapshot(session, telegram_id)
+    ts = await set_task_status(session, task_id, status, comment=None, user_id=user.id) if user else None
+    if not ts:
+        await callback.answer("Ошибка доступа")
+        return
+    await callback.answer("Сохранено")
+    plan = await get_plan_for_task(session, task_id)
+    if not plan:
+        return
+    await _show_evening_review(callback, session, state, plan, user.id)
+
+
+@router.callback_query(F.data.startswith("plan_done_all_"))
+async def mark_plan_done_callback(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
+    plan_id = _task_id_from_callback(callback.data or "")
+    telegram_id = callback.from_user.id if callback.from_user else None
+    if plan_id is None or not telegram_id:
+        await callback.answer("Ошибка")
+        return
+    user = await get_user_snapshot(session, telegram_id)
+    updated = await mark_plan_done(session, plan_id, user_id=user.id) if user else None
+    if updated is None:
         await callback.answer("Ошибка доступа")
         return
-    plan_id = task.plan_id
-    plan_date = task.plan.date
-    await state.set_state(PlanStates.awaiting_confirmation)
-    await state.set_data({"plan_id": plan_id, "plan_date": plan_date.isoformat()})
-    await set_task_status(session, task_id, status, comment=None)
     await callback.answer("Сохранено")
     plan = await get_plan_by_id(session, plan_id)
     if not plan:
         return
+    await _show_evening_review(callback, session, state, plan, user.id)
+
+
+async def _show_evening_review(callback: CallbackQuery, session: AsyncSession, state: FSMContext, plan, user_id: int):
+    """Re-render the evening message after statuses changed: open tasks keep their buttons, else ask for a day comment."""
+    plan_date = plan.date
+    await state.set_state(PlanStates.awaiting_confirmation)
+    await state.set_data({"plan_id": plan.id, "plan_date": plan_date.isoformat(), "user_id": user_id})
     tasks_with_status = [
         (t.text, t.status.status_enum if t.status else None)
         for t in sorted(plan.tasks, key=lambda x: x.position)
@@ -79,7 +102,7 @@ async def set_status_callback(callback: CallbackQuery, session: AsyncSession, st
         await callback.message.edit_text(text, reply_markup=evening_done_keyboard())
     else:
         tasks_kb = [(t.id, t.status.status_enum if t.status else None) for t in sorted(plan.tasks, key=lambda x: x.position)]
-        await callback.message.edit_text(text, reply_markup=evening_inline_keyboard(tasks_kb))
+        await callback.message.edit_text(text, reply_markup=evening_inline_keyboard(tasks_kb, plan.id))
 
 
 @router.callback_query(F.data.startswith("task_comment_"))
@@ -92,7 +115,7 @@ async def ask_comment_callback(callback: CallbackQuery, session: AsyncSession, s
     if not telegram_id:
         await callback.answer("Ошибка")
         return
-    user = await get_user_by_telegram_id(session, telegram_id)
+    user = await get_user_snapshot(session, telegram_id)
     task = await get_task_with_plan(session, task_id)
     if not user or not task or not task.plan or task.plan.user_id != user.id:
         await callback.answer("Ошибка доступа")
@@ -100,7 +123,7 @@ async def ask_comment_callback(callback: CallbackQuery, session: AsyncSession, s
     plan_id = task.plan_id
     plan_date = task.plan.date
     await state.set_state(PlanStates.awaiting_confirmation)
-    await state.set_data({"plan_id": plan_id, "plan_date": plan_date.isoformat()})
+    await state.set_data({"plan_id": plan_id, "plan_date": plan_date.isoformat(), "user_id": user.id})
     await state.update_data(comment_task_id=task_id)
     await state.set_state(PlanStates.awaiting_comment)
     await callback.answer()
@@ -115,7 +138,7 @@ async def receive_comment(message: Message, session: AsyncSession, state: FSMCon
         await state.clear()
         return
     comment = None if (message.text or "").strip() in ("-", "") else (message.text or "").strip()[:500]
-    await update_task_comment(session, task_id, comment)
+    await update_task_comment(session, task_id, comment, user_id=data.get("user_id"))
     await state.set_state(PlanStates.awaiting_confirmation)
     await state.update_data(comment_task_id=None)
     plan_id = data.get("plan_id")
@@ -131,7 +154,7 @@ async def receive_comment(message: Message, session: AsyncSession, state: FSMCon
         ]
         text = format_evening_plan(plan_date, tasks_with_status) + EVENING_AFTER_STATUSES
         tasks_kb = [(t.id, t.status.status_enum if t.status else None) for t in sorted(plan.tasks, key=lambda x: x.position)]
-        await message.answer(text, reply_markup=evening_inline_keyboard(tasks_kb))
+        await message.answer(text, reply_markup=evening_inline_keyboard(tasks_kb, plan.id))
     else:
         await message.answer("План не найден.")
         await state.clear()
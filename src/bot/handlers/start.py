@@ -19,7 +19,7 @@ from src.bot.text import (
     MORNING_PROMPT, TEST_MORNING_SENT, TEST_EVENING_SENT, TEST_DELIVERY_ERROR, format_evening_plan
 )
 from src.bot.user_flow import get_user_or_run_onboarding
-from src.config import Settings
+from src.config import get_settings
 from src.db.models import NotificationLog
 from src.scheduler.tasks import _get_dispatch_window, send_evening_prompt, send_morning_prompt
 from src.services.notifications import TYPE_EVENING, TYPE_MORNING, STATUS_SENT
@@ -66,7 +66,7 @@ def _parse_hhmm(value: str) -> time | None:
 
 
 def _build_webapp_url() -> str | None:
-    base = Settings().webhook_base_url.strip()
+    base = get_settings().webhook_base_url.strip()
     if not base:
         return None
     return f"{base.rstrip('/')}/webapp"
@@ -249,7 +249,7 @@ async def cmd_test_evening(message: Message, session: AsyncSession):
             tasks_kb = [(t.id, t.status.status_enum if t.status else None) for t in sorted(plan.tasks, key=lambda x: x.position)]
             await message.answer(
                 text,
-                reply_markup=evening_inline_keyboard(tasks_kb),
+                reply_markup=evening_inline_keyboard(tasks_kb, plan.id),
             )
         await message.answer(TEST_EVENING_SENT)
     except Exception as e:
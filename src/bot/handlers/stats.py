@@ -1,14 +1,17 @@
-"""Stats: /today, /history, /stats."""
+"""Stats: /today, /history, /stats, /export."""
 from datetime import date
+import os
 import re
+import tempfile
 
 from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message
+from aiogram.types import FSInputFile, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.bot.user_flow import get_user_or_run_onboarding
+from src.services.export import EXPORT_FORMATS, stream_export
 from src.services.stats import get_today_plan, get_history, get_stats, get_completion_percent_for_plan
 
 router = Router()
@@ -51,9 +54,8 @@ async def cmd_history(message: Message, session: AsyncSession, state: FSMContext
         await message.answer(f"За {year}-{month:02d} планов нет.")
         return
     lines = [f"История за {year}-{month:02d}:", ""]
-    for plan, done, total in items:
-        pct = int(round(100 * done / total)) if total else 0
-        lines.append(f"{plan.date}: {done}/{total} ({pct}%)")
+    for day in items:
+        lines.append(f"{day.date}: {int(day.done)}/{day.total} ({day.percent}%)")
     await message.answer("\n".join(lines))
 
 
@@ -73,3 +75,25 @@ async def cmd_stats(message: Message, session: AsyncSession, state: FSMContext):
         f"Средний % выполнения: {s['avg_percent']}%\n"
         f"Текущий стрик (дней подряд 100%): {s['current_streak']}"
     )
+
+
+@router.message(Command("export"))
+async def cmd_export(message: Message, session: AsyncSession, state: FSMContext):
+    """/export [csv|ndjson]: send the full history as a document (streamed to a temp file first)."""
+    user = await get_user_or_run_onboarding(session, message.from_user.id, message, state)
+    if not user:
+        return
+    parts = (message.text or "").split()
+    fmt = parts[1].lower() if len(parts) > 1 else "csv"
+    if fmt not in EXPORT_FORMATS:
+        await message.answer("Использование: /export [csv|ndjson]")
+        return
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            async for chunk in stream_export(user.id, fmt):
+                f.write(chunk)
+        filename = f"plans-{date.today().isoformat()}.{fmt}"
+        await message.answer_document(FSInputFile(path, filename=filename), caption="Экспорт всех планов")
+    finally:
+        os.unlink(path)
@@ -27,8 +27,8 @@ def tz_keyboard(include_detect: bool = False) -> ReplyKeyboardMarkup:
         # Add WebApp button for timezone detection
         from aiogram.types import WebAppInfo
         try:
-            from src.config import Settings
-            webapp_url = Settings().webhook_base_url.strip()
+            from src.config import get_settings
+            webapp_url = get_settings().webhook_base_url.strip()
             if webapp_url:
                 detect_url = f"{webapp_url.rstrip('/')}/timezone-detector"
                 rows.append([
@@ -79,8 +79,13 @@ def morning_reply_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
-def evening_inline_keyboard(tasks_with_status: list[tuple[int, str | None]]) -> InlineKeyboardMarkup:
-    """One row per task that is not 'done': [✅] [⚠] [❌] [💬]. For status 'done' no buttons (cannot change)."""
+def evening_inline_keyboard(
+    tasks_with_status: list[tuple[int, str | None]], plan_id: int | None = None
+) -> InlineKeyboardMarkup:
+    """
+    One row per task that is not 'done': [✅] [⚠] [❌] [💬]. For status 'done' no buttons (cannot change).
+    With plan_id and more than one open task, a last row marks the whole plan done.
+    """
     rows = []
     for tid, status_enum in tasks_with_status:
         if status_enum == "done":
@@ -91,6 +96,8 @@ def evening_inline_keyboard(tasks_with_status: list[tuple[int, str | None]]) ->
             InlineKeyboardButton(text="❌", callback_data=f"task_failed_{tid}"),
             InlineKeyboardButton(text="💬", callback_data=f"task_comment_{tid}"),
         ])
+    if plan_id is not None and len(rows) > 1:
+        rows.append([InlineKeyboardButton(text="✅ Всё выполнено", callback_data=f"plan_done_all_{plan_id}")])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
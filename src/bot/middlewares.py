@@ -1,15 +1,22 @@
-"""Middlewares: request_id, db session, validation."""
+"""Middlewares: request_id, db session, query stats, update dedup, validation."""
 import logging
 import uuid
+from dataclasses import asdict, dataclass
 from typing import Any, Awaitable, Callable
 
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
 
+from src.config import get_settings
 from src.db import session as db_session
+from src.db.query_stats import track_queries
+from src.services.cache import get_redis
+from src.services.changes import publish_changes
 
 logger = logging.getLogger(__name__)
 
+UPDATE_SEEN_KEY = "update_seen:{bot_id}:{update_id}"
+
 
 class RequestIdMiddleware(BaseMiddleware):
     """Set request_id in data and log."""
@@ -42,7 +49,95 @@ class DbSessionMiddleware(BaseMiddleware):
             try:
                 result = await handler(event, data)
                 await session.commit()
+                await publish_changes(session)
                 return result
             except Exception:
                 await session.rollback()
                 raise
+
+
+class QueryStatsMiddleware(BaseMiddleware):
+    """Outer update middleware: count SQL queries and DB time per update and log them."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        with track_queries() as stats:
+            try:
+                return await handler(event, data)
+            finally:
+                logger.info(
+                    "update_id=%s queries=%d db_time_ms=%.1f",
+                    getattr(event, "update_id", None),
+                    stats.count,
+                    stats.duration_ms,
+                )
+
+
+@dataclass
+class DedupCounters:
+    checked: int = 0
+    dropped: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+dedup_counters = DedupCounters()
+
+
+async def claim_update(bot_id: int, update_id: int) -> bool:
+    """
+    Take update_id for processing: False if it was already taken within the window (a redelivery).
+    The claim is a Redis SET NX EX, so it holds across replicas and between webhook and polling.
+    Without Redis the update is let through (a duplicate is better than a lost update).
+    """
+    window = get_settings().update_dedup_window_seconds
+    if window <= 0:
+        return True
+    dedup_counters.checked += 1
+    try:
+        claimed = await get_redis().set(
+            UPDATE_SEEN_KEY.format(bot_id=bot_id, update_id=update_id), "1", nx=True, ex=window
+        )
+    except Exception as e:
+        dedup_counters.errors += 1
+        logger.warning("update_id=%s dedup check failed: %s", update_id, e)
+        return True
+    if not claimed:
+        dedup_counters.dropped += 1
+        logger.info("update_id=%s already processed, dropped (total dropped=%d)", update_id, dedup_counters.dropped)
+    return bool(claimed)
+
+
+async def release_update(bot_id: int, update_id: int) -> None:
+    """Undo claim_update for an update that was not accepted after all, so its redelivery is processed."""
+    try:
+        await get_redis().delete(UPDATE_SEEN_KEY.format(bot_id=bot_id, update_id=update_id))
+    except Exception as e:
+        logger.warning("update_id=%s dedup release failed: %s", update_id, e)
+
+
+class UpdateDedupMiddleware(BaseMiddleware):
+    """
+    Outer update middleware: drop an update whose update_id was already claimed (see claim_update).
+    Used in polling mode; the webhook claims before queueing, so redeliveries never take a queue slot.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        update_id = getattr(event, "update_id", None)
+        if update_id is None:
+            return await handler(event, data)
+        bot = data.get("bot")
+        if not await claim_update(bot.id if bot else 0, update_id):
+            return None
+        return await handler(event, data)
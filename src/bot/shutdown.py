@@ -0,0 +1,89 @@
+"""
+Graceful shutdown shared by webhook and polling mode.
+
+In-flight updates get a deadline to finish (so their transactions commit and replies go out);
+only then are the bot session, FSM storage, Redis clients and DB engine closed, in that order,
+because handlers still need all of them.
+"""
+import asyncio
+import logging
+import signal
+import threading
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.services.cache import close_redis
+
+logger = logging.getLogger(__name__)
+
+
+def on_termination(callback: Callable[[], None], signals=(signal.SIGTERM, signal.SIGINT)) -> None:
+    """
+    Run callback on the running loop as soon as a termination signal arrives, then the handler that was
+    installed before (the server's own). uvicorn waits for open connections before the lifespan shutdown,
+    so long-lived responses have to learn about the signal this way.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for sig in signals:
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(callback)
+            previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+
+class InFlightMiddleware(BaseMiddleware):
+    """Outer update middleware remembering the tasks that are handling an update right now (polling mode)."""
+
+    def __init__(self):
+        self.tasks: set[asyncio.Task] = set()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        try:
+            return await handler(event, data)
+        finally:
+            self.tasks.discard(task)
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for running updates, cancel the rest. False if any were cancelled."""
+        if not self.tasks:
+            return True
+        _done, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+        if pending:
+            logger.warning("Shutdown deadline hit with %d updates running; cancelling them", len(pending))
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return not pending
+
+
+async def close_resources(bot: Bot, storage: BaseStorage, engine: AsyncEngine) -> None:
+    """Close everything update handling depends on; a failing step does not skip the next ones."""
+    steps = (
+        ("bot session", bot.session.close),
+        ("FSM storage", storage.close),
+        ("redis", close_redis),
+        ("db engine", engine.dispose),
+    )
+    for name, close in steps:
+        try:
+            await close()
+        except Exception as e:
+            logger.warning("Failed to close %s on shutdown: %s", name, e)
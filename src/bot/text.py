@@ -37,6 +37,7 @@ COMMANDS_OVERVIEW = (
     "/delete_plan - удалить план на сегодня\n"
     "/history YYYY-MM - история планов за месяц\n"
     "/stats - общая статистика\n"
+    "/export - выгрузить всю историю (CSV или /export ndjson)\n"
     "/settings - текущие настройки\n"
     "/reminders - список кастомных напоминаний\n"
     "/reminder_add - добавить новое напоминание\n"
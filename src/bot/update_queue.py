@@ -0,0 +1,147 @@
+"""
+Bounded worker pool for webhook updates.
+
+Updates of one chat are processed strictly in arrival order, different chats in parallel by a fixed
+number of workers. A chat is handed to at most one worker at a time: it sits in the ready queue once,
+prioritized by its oldest update (callback queries first, since a user is waiting on a button spinner).
+When too many updates are pending, submit() refuses new ones so the webhook can answer 503
+and Telegram redelivers later. On shutdown drain() refuses new updates the same way and lets the
+workers finish the queued ones within a deadline.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_CALLBACK = 0
+PRIORITY_DEFAULT = 1
+
+
+def chat_key(update: dict[str, Any]) -> tuple[str, int]:
+    """Ordering key of a raw update: its chat, else its sender, else the update itself."""
+    for field in ("message", "edited_message", "channel_post", "edited_channel_post", "business_message"):
+        chat = (update.get(field) or {}).get("chat")
+        if chat and "id" in chat:
+            return "chat", chat["id"]
+    callback = update.get("callback_query")
+    if callback:
+        chat = (callback.get("message") or {}).get("chat")
+        if chat and "id" in chat:
+            return "chat", chat["id"]
+    for value in update.values():
+        if isinstance(value, dict) and isinstance(value.get("from"), dict) and "id" in value["from"]:
+            return "user", value["from"]["id"]
+    return "update", update.get("update_id", 0)
+
+
+def update_priority(update: dict[str, Any]) -> int:
+    return PRIORITY_CALLBACK if "callback_query" in update else PRIORITY_DEFAULT
+
+
+class UpdateQueue:
+    def __init__(
+        self,
+        handler: Callable[[dict[str, Any]], Awaitable[None]],
+        workers: int = 8,
+        max_pending: int = 1000,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self._chats: dict[tuple[str, int], deque[dict[str, Any]]] = {}
+        self._ready: asyncio.PriorityQueue[tuple[int, int, tuple[str, int]]] = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._tasks: list[asyncio.Task] = []
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.closed = False
+        self.pending = 0
+        self.processed = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker(), name=f"update-worker-{i}") for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers; updates still queued are dropped (Telegram redelivers unacknowledged ones only)."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def close(self) -> None:
+        """Refuse new updates from now on; queued ones are still processed."""
+        self.closed = True
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Stop accepting updates, wait up to `timeout` seconds for the queued ones, then stop the workers.
+        Returns False if updates were still pending at the deadline (they are cancelled).
+        """
+        self.close()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Shutdown deadline hit with %d updates pending; cancelling them", self.pending)
+        drained = self.pending == 0
+        await self.stop()
+        return drained
+
+    def submit(self, update: dict[str, Any]) -> bool:
+        """Queue an update; False if the pool is saturated or shutting down (caller should ask Telegram to retry)."""
+        if self.closed:
+            return False
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return False
+        key = chat_key(update)
+        queue = self._chats.get(key)
+        if queue is None:
+            # Chat is idle: nobody holds it, so schedule it.
+            self._chats[key] = deque([update])
+            self._schedule(key, update)
+        else:
+            queue.append(update)
+        self.pending += 1
+        self._idle.clear()
+        return True
+
+    def _schedule(self, key: tuple[str, int], head: dict[str, Any]) -> None:
+        self._ready.put_nowait((update_priority(head), next(self._seq), key))
+
+    async def _worker(self) -> None:
+        while True:
+            _priority, _seq, key = await self._ready.get()
+            queue = self._chats[key]
+            update = queue.popleft()
+            try:
+                await self.handler(update)
+            except Exception:
+                logger.exception("Update handler failed for %s", key)
+            finally:
+                self.pending -= 1
+                self.processed += 1
+                if not self.pending:
+                    self._idle.set()
+                if queue:
+                    self._schedule(key, queue[0])
+                else:
+                    del self._chats[key]
+                self._ready.task_done()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": self.pending,
+            "chats": len(self._chats),
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "closed": int(self.closed),
+        }
@@ -1,7 +1,7 @@
 """User flow helpers: require user (with timezone) or ask once."""
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Protocol
+from typing import Protocol
 
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,10 +9,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.bot.keyboards import tz_keyboard, onboarding_time_keyboard
 from src.bot.states import OnboardingStates
 from src.bot.text import TIMEZONE_CHOOSE_PROMPT
-from src.services.user import get_or_create_user, get_user_by_telegram_id
-
-if TYPE_CHECKING:
-    from src.db.models import User
+from src.services.user import get_or_create_user, get_user_snapshot
+from src.services.user_cache import UserSnapshot
 
 
 class AnswerTarget(Protocol):
@@ -26,14 +24,14 @@ async def get_user_or_run_onboarding(
     telegram_id: int,
     answer_target: AnswerTarget,
     state: FSMContext | None = None,
-) -> User | None:
+) -> UserSnapshot | None:
     """
     Return user if they exist and finished onboarding. Otherwise create/fetch user,
     determine next onboarding step, send prompt, set FSM state, and return None.
     """
-    user = await get_user_by_telegram_id(session, telegram_id)
+    user = await get_user_snapshot(session, telegram_id)
     if not user:
-        user = await get_or_create_user(session, telegram_id)
+        user = UserSnapshot.from_user(await get_or_create_user(session, telegram_id))
 
     if not user.onboarding_tz_confirmed:
         if state:
@@ -1,4 +1,6 @@
 """Application configuration from environment."""
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,6 +15,8 @@ class Settings(BaseSettings):
     telegram_bot_token: str
     webhook_secret: str = ""
     webhook_base_url: str = ""
+    # Shared secret for /api/admin/* (X-Admin-Token header); empty disables the admin API.
+    admin_api_token: str = ""
 
     # Database
     database_url: str
@@ -22,14 +26,46 @@ class Settings(BaseSettings):
 
     # App
     log_level: str = "INFO"
+    # Add X-DB-Query-Count / X-DB-Time-Ms headers to HTTP responses (debugging only).
+    db_debug_headers: bool = False
 
     # Scheduler: how many minutes after target time we still dispatch notifications.
     # Increase this if celery_beat occasionally drifts or misses a tick.
     dispatch_window_minutes: int = 10
 
+    # Webhook: concurrent update handlers, and queued updates beyond which the webhook answers 503.
+    webhook_workers: int = 8
+    webhook_max_pending: int = 1000
+    # Updates with an update_id seen within this window are dropped (redeliveries); 0 disables it.
+    update_dedup_window_seconds: int = 3600
+    # Shutdown: how long in-flight updates may finish before they are cancelled. Keep it below the
+    # container stop timeout (docker: 10 s by default), otherwise SIGKILL comes first.
+    shutdown_drain_timeout_seconds: float = 8.0
+
+    # Archive: plans of months that ended more than this many days ago move to plan_archive.
+    archive_after_days: int = 365
+
+    # Per-user Redis cache of stats/history reads; 0 disables it.
+    stats_cache_ttl_seconds: int = 600
+    # History of months that ended more than this many days ago is cached until a plan of it changes.
+    history_immutable_after_days: int = 7
+    history_immutable_ttl_seconds: int = 30 * 24 * 3600
+
     @property
     def database_url_sync(self) -> str:
         """Synchronous URL for Alembic (replace asyncpg with psycopg2)."""
         if "+asyncpg" in self.database_url:
             return self.database_url.replace("+asyncpg", "").strip()
         return self.database_url
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Process-wide settings, read from the environment and .env once."""
+    return Settings()
+
+
+def reload_settings() -> Settings:
+    """Drop the cached settings and read them again (tests, config reloads)."""
+    get_settings.cache_clear()
+    return get_settings()
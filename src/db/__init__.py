@@ -1,8 +1,11 @@
 """Database package."""
 from src.db.models import (
     CustomReminder,
+    DailyGlobalStats,
     NotificationLog,
     Plan,
+    PlanArchive,
+    ReminderEvent,
     Task,
     TaskStatus,
     User,
@@ -16,8 +19,11 @@ from src.db.session import (
 
 __all__ = [
     "CustomReminder",
+    "DailyGlobalStats",
     "User",
     "Plan",
+    "PlanArchive",
+    "ReminderEvent",
     "Task",
     "TaskStatus",
     "NotificationLog",
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import date, datetime, time
-from sqlalchemy import BigInteger, Boolean, Date, DateTime, ForeignKey, Integer, Text, Time, UniqueConstraint
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, ForeignKey, Index, Integer, Text, Time, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -42,8 +42,8 @@ class Plan(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
-    date: Mapped[date] = mapped_column(Date, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(nullable=False, default=datetime.utcnow)
+    date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(nullable=False, default=datetime.utcnow, index=True)
 
     user: Mapped["User"] = relationship("User", back_populates="plans")
     tasks: Mapped[list["Task"]] = relationship("Task", back_populates="plan", cascade="all, delete-orphan", order_by="Task.position")
@@ -76,6 +76,46 @@ class TaskStatus(Base):
     task: Mapped["Task"] = relationship("Task", back_populates="status")
 
 
+class PlanArchive(Base):
+    """Compacted plans of one user for one calendar month (tasks, statuses, comments as JSONB)."""
+
+    __tablename__ = "plan_archive"
+    __table_args__ = (UniqueConstraint("user_id", "month", name="uq_plan_archive_user_month"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    month: Mapped[date] = mapped_column(Date, nullable=False)  # first day of month
+    plan_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    percent_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)  # {"plans": [{"date", "percent", "tasks": [...]}]}
+    created_at: Mapped[datetime] = mapped_column(nullable=False, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DailyGlobalStats(Base):
+    """Operator analytics for one day, precomputed by the rollup task (never computed on request)."""
+
+    __tablename__ = "daily_global_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    active_planners: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # users with a plan for the day
+    plans_created: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tasks_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Completion distribution of the day's plans
+    plans_full: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # 100%
+    plans_partial: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # 1-99%
+    plans_zero: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # 0% or no tasks
+    avg_percent: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Reminder volume (morning/evening notifications)
+    notifications_sent: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    notifications_failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Custom reminders (from reminder_event)
+    reminders_sent: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    reminders_failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    reminders_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    computed_at: Mapped[datetime] = mapped_column(nullable=False, default=datetime.utcnow)
+
+
 class NotificationLog(Base):
     __tablename__ = "notification_log"
 
@@ -84,7 +124,7 @@ class NotificationLog(Base):
     type: Mapped[str] = mapped_column(Text, nullable=False)  # morning, evening
     status: Mapped[str] = mapped_column(Text, nullable=False)  # sent, failed, retried
     payload: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(nullable=False, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(nullable=False, default=datetime.utcnow, index=True)
 
     user: Mapped["User"] = relationship("User", back_populates="notification_logs")
 
@@ -119,3 +159,22 @@ class CustomReminder(Base):
     updated_at: Mapped[datetime] = mapped_column(nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user: Mapped["User"] = relationship("User", back_populates="custom_reminders")
+
+
+class ReminderEvent(Base):
+    """Append-only custom reminder history: sent, failed, done, disabled."""
+
+    __tablename__ = "reminder_event"
+    __table_args__ = (
+        Index("ix_reminder_event_user_created", "user_id", "created_at"),
+        Index("ix_reminder_event_reminder_created", "reminder_id", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    # Kept (as NULL) after the reminder is deleted so global volume stays correct.
+    reminder_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("custom_reminder.id", ondelete="SET NULL"), nullable=True
+    )
+    kind: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(nullable=False, default=datetime.utcnow)
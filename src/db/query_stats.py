@@ -0,0 +1,82 @@
+"""Per-request SQL instrumentation: query count and DB time via SQLAlchemy engine events."""
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+
+MAX_RECORDED_STATEMENTS = 50
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0  # seconds spent in cursor.execute
+    statements: list[str] = field(default_factory=list)
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+def begin_tracking() -> tuple[QueryStats, Token]:
+    """Start a fresh QueryStats for the current context; pass the token to end_tracking()."""
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_tracking(token: Token) -> None:
+    _current_stats.reset(token)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count statements executed in the current context (update, API request, Celery task)."""
+    stats, token = begin_tracking()
+    try:
+        yield stats
+    finally:
+        end_tracking(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started_at")
+    elapsed = time.perf_counter() - started.pop() if started else 0.0
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    stats.count += 1
+    stats.duration += elapsed
+    if len(stats.statements) < MAX_RECORDED_STATEMENTS:
+        stats.statements.append(statement)
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine):
+    """Attach query counting listeners to a sync or async engine (idempotent)."""
+    target = getattr(engine, "sync_engine", engine)
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_error)
+    return engine
@@ -4,7 +4,8 @@ from collections.abc import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
-from src.config import Settings
+from src.config import get_settings
+from src.db.query_stats import instrument_engine
 
 
 class Base(DeclarativeBase):
@@ -12,12 +13,13 @@ class Base(DeclarativeBase):
 
 
 def get_engine(database_url: str | None = None):
-    url = database_url or Settings().database_url
-    return create_async_engine(
+    url = database_url or get_settings().database_url
+    engine = create_async_engine(
         url,
         echo=False,
         pool_pre_ping=True,
     )
+    return instrument_engine(engine)
 
 
 def init_async_engine(database_url: str | None = None):
@@ -40,12 +42,15 @@ def set_async_session_factory(engine):
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    from src.services.changes import publish_changes
+
     if not async_session_factory:
         raise RuntimeError("Async session factory not initialized. Call set_async_session_factory(engine) first.")
     async with async_session_factory() as session:
         try:
             yield session
             await session.commit()
+            await publish_changes(session)
         except Exception:
             await session.rollback()
             raise
@@ -0,0 +1,96 @@
+"""Completion analytics over a dense, day-indexed series (heatmap, trends, streaks, weekday profile)."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date, timedelta
+from itertools import accumulate
+
+ROLLING_WINDOWS = (7, 30)
+
+
+def dense_series(
+    days: Iterable[tuple[date, float, int, int]],
+    first: date,
+    last: date,
+) -> tuple[list[int | None], list[float], list[int]]:
+    """
+    Scatter sparse (date, done, total, percent) rows into parallel arrays indexed by day offset from `first`.
+    Days without a plan have percent None and done/total 0.
+    """
+    n = (last - first).days + 1
+    percent: list[int | None] = [None] * n
+    done = [0.0] * n
+    total = [0] * n
+    for d, day_done, day_total, day_percent in days:
+        i = (d - first).days
+        if 0 <= i < n:
+            percent[i] = int(day_percent)
+            done[i] = float(day_done)
+            total[i] = int(day_total)
+    return percent, done, total
+
+
+def rolling_average(percent: list[int | None], window: int) -> list[float | None]:
+    """Trailing mean of percent over `window` days, ignoring days without a plan (None if there are none)."""
+    sums = [0, *accumulate(p or 0 for p in percent)]
+    counts = [0, *accumulate(p is not None for p in percent)]
+    result: list[float | None] = []
+    for i in range(1, len(sums)):
+        j = max(0, i - window)
+        c = counts[i] - counts[j]
+        result.append(round((sums[i] - sums[j]) / c, 1) if c else None)
+    return result
+
+
+def _runs(mask: list[bool]) -> tuple[int, int, int]:
+    """(longest run length, start index of the longest run, length of the run ending at the last index)."""
+    longest = start = current = 0
+    for i, flag in enumerate(mask):
+        current = current + 1 if flag else 0
+        if current > longest:
+            longest, start = current, i - current + 1
+    return longest, start, current
+
+
+def streaks(percent: list[int | None], first: date) -> dict:
+    """Longest run of 100% days, longest run of days with any plan, and the 100% streak ending at the last day."""
+    full_len, full_start, current = _runs([p == 100 for p in percent])
+    planned_len, planned_start, _ = _runs([p is not None for p in percent])
+    return {
+        "best": full_len,
+        "best_from": (first + timedelta(days=full_start)).isoformat() if full_len else None,
+        "longest_planned": planned_len,
+        "longest_planned_from": (first + timedelta(days=planned_start)).isoformat() if planned_len else None,
+        "current": current,
+    }
+
+
+def weekday_profile(percent: list[int | None], first: date) -> dict:
+    """Average percent and number of planned days per weekday (index 0 = Monday)."""
+    sums = [0] * 7
+    counts = [0] * 7
+    offset = first.weekday()
+    for i, p in enumerate(percent):
+        if p is not None:
+            wd = (offset + i) % 7
+            sums[wd] += p
+            counts[wd] += 1
+    return {
+        "avg": [round(s / c, 1) if c else None for s, c in zip(sums, counts)],
+        "days": counts,
+    }
+
+
+def heatmap(days: Iterable[tuple[date, float, int, int]], first: date, last: date) -> dict:
+    """Columnar heatmap payload: parallel per-day arrays starting at `first`, plus trends and aggregates."""
+    percent, done, total = dense_series(days, first, last)
+    return {
+        "from": first.isoformat(),
+        "to": last.isoformat(),
+        "percent": percent,
+        "done": done,
+        "total": total,
+        "rolling": {str(w): rolling_average(percent, w) for w in ROLLING_WINDOWS},
+        "streaks": streaks(percent, first),
+        "weekday": weekday_profile(percent, first),
+    }
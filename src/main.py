@@ -1,29 +1,46 @@
 """FastAPI app and webhook entry for the planning bot."""
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.redis import RedisStorage
 from fastapi import FastAPI, Request
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse
 
-from src.api import webapp_api_router
-from src.config import Settings
+from src.api import admin_api_router, webapp_api_router
+from src.api.auth import init_data_cache
+from src.api.responses import OrjsonResponse
+from src.api.static import InMemoryPage, PrecompressedStaticFiles
+from src.config import get_settings
 from src.db import init_async_engine, set_async_session_factory
+from src.db.query_stats import track_queries
 from src.bot.handlers import router as bot_router
-from src.bot.middlewares import DbSessionMiddleware, RequestIdMiddleware
+from src.bot.middlewares import (
+    DbSessionMiddleware,
+    QueryStatsMiddleware,
+    RequestIdMiddleware,
+    claim_update,
+    dedup_counters,
+    release_update,
+)
+from src.bot.shutdown import close_resources, on_termination
+from src.bot.update_queue import UpdateQueue
+from src.services.cache import counters as cache_counters
+from src.services.events import event_broker, run_event_listener
+from src.services.user_cache import run_invalidation_listener, user_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 def create_bot_and_dp():
-    settings = Settings()
+    settings = get_settings()
     storage = RedisStorage.from_url(settings.redis_url)
     bot = Bot(token=settings.telegram_bot_token)
     dp = Dispatcher(storage=storage)
+    dp.update.outer_middleware(QueryStatsMiddleware())
     dp.message.middleware(DbSessionMiddleware())
     dp.message.middleware(RequestIdMiddleware())
     dp.callback_query.middleware(DbSessionMiddleware())
@@ -32,20 +49,73 @@ def create_bot_and_dp():
     return bot, dp
 
 
+def _begin_shutdown() -> None:
+    """
+    First step of shutdown, run on SIGTERM: the webhook answers 503 (Telegram redelivers to the next
+    instance) and open event streams end, so the server stops waiting for them and reaches the drain.
+    """
+    if not update_queue.closed:
+        logger.info("Termination requested: refusing new updates, closing event streams")
+    update_queue.close()
+    event_broker.close()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    settings = Settings()
+    settings = get_settings()
     engine = init_async_engine(settings.database_url)
     set_async_session_factory(engine)
+    webapp_shell.load()
+    timezone_detector_page.load()
+    update_queue.start()
+    listeners = [asyncio.create_task(run_invalidation_listener()), asyncio.create_task(run_event_listener())]
+    on_termination(_begin_shutdown)
     yield
-    await engine.dispose()
+    _begin_shutdown()
+    logger.info("Shutting down: draining %d pending updates", update_queue.pending)
+    drained = await update_queue.drain(settings.shutdown_drain_timeout_seconds)
+    logger.info("Update queue %s", "drained" if drained else "cancelled at deadline")
+    for listener in listeners:
+        listener.cancel()
+    for listener in listeners:
+        with suppress(asyncio.CancelledError):
+            await listener
+    await close_resources(bot, dp.storage, engine)
+
+
+app = FastAPI(title="Planning Bot", lifespan=lifespan, default_response_class=OrjsonResponse)
+
+
+@app.middleware("http")
+async def query_stats_middleware(request: Request, call_next):
+    """Count SQL queries and DB time per HTTP request; log them and optionally expose as headers."""
+    with track_queries() as stats:
+        response = await call_next(request)
+    if stats.count:
+        logger.info(
+            "%s %s queries=%d db_time_ms=%.1f",
+            request.method,
+            request.url.path,
+            stats.count,
+            stats.duration_ms,
+        )
+    if get_settings().db_debug_headers:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.duration_ms:.1f}"
+    return response
 
-
-app = FastAPI(title="Planning Bot", lifespan=lifespan)
 bot, dp = create_bot_and_dp()
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
-app.mount("/static", StaticFiles(directory=str(PROJECT_ROOT / "static")), name="static")
+# Vite emits content-hashed file names under dist/assets.
+app.mount(
+    "/static",
+    PrecompressedStaticFiles(directory=str(PROJECT_ROOT / "static"), immutable_prefixes=("dist/assets",)),
+    name="static",
+)
+webapp_shell = InMemoryPage(PROJECT_ROOT / "static" / "dist" / "index.html", PROJECT_ROOT / "templates" / "webapp.html")
+timezone_detector_page = InMemoryPage(PROJECT_ROOT / "templates" / "timezone-detector.html")
 app.include_router(webapp_api_router)
+app.include_router(admin_api_router)
 
 
 @app.get("/health")
@@ -53,21 +123,31 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """In-process counters (per worker)."""
+    return {
+        "cache": cache_counters.as_dict(),
+        "webapp_auth": init_data_cache.stats(),
+        "users": user_cache.stats(),
+        "events": event_broker.stats(),
+        "updates": {**update_queue.stats(), "duplicates": dedup_counters.as_dict()},
+    }
+
+
 @app.get("/webapp")
-async def webapp():
-    dist_index = PROJECT_ROOT / "static" / "dist" / "index.html"
-    if dist_index.exists():
-        return FileResponse(dist_index)
-    return FileResponse(PROJECT_ROOT / "templates" / "webapp.html")
+async def webapp(request: Request):
+    """WebApp shell (built index.html, else the template), served from memory."""
+    return webapp_shell.response(request)
 
 
 @app.get("/timezone-detector")
-async def timezone_detector():
-    return FileResponse(PROJECT_ROOT / "templates" / "timezone-detector.html")
+async def timezone_detector(request: Request):
+    return timezone_detector_page.response(request)
 
 
 async def _process_update(body: dict) -> None:
-    """Process update in background (log errors, do not fail webhook response)."""
+    """Process one update on an update_queue worker (log errors, do not fail webhook response)."""
     try:
         from aiogram.types import Update
         update = Update.model_validate(body)
@@ -80,9 +160,16 @@ async def _process_update(body: dict) -> None:
         logger.exception("Webhook processing error: %s", e)
 
 
+update_queue = UpdateQueue(
+    _process_update,
+    workers=get_settings().webhook_workers,
+    max_pending=get_settings().webhook_max_pending,
+)
+
+
 async def _handle_webhook(request: Request) -> JSONResponse | dict:
     logger.info("Webhook request received")
-    settings = Settings()
+    settings = get_settings()
     if settings.webhook_secret:
         secret_header = request.headers.get("X-Telegram-Bot-Api-Secret-Token")
         if secret_header != settings.webhook_secret:
@@ -92,9 +179,21 @@ async def _handle_webhook(request: Request) -> JSONResponse | dict:
     except Exception as e:
         logger.exception("Webhook body error: %s", e)
         return JSONResponse(status_code=400, content={"ok": False, "error": str(e)})
-    # Return 200 immediately so Telegram does not retry; process in background
-    import asyncio
-    asyncio.create_task(_process_update(body))
+    if not isinstance(body, dict):
+        return JSONResponse(status_code=400, content={"ok": False, "error": "Update must be an object"})
+    if update_queue.closed:
+        logger.info("Webhook refused: shutting down")
+        return JSONResponse(status_code=503, content={"ok": False})
+    # Redeliveries are dropped here, before they take a queue slot.
+    update_id = body.get("update_id")
+    if isinstance(update_id, int) and not await claim_update(bot.id, update_id):
+        return {"ok": True}
+    # Return 200 immediately so Telegram does not retry; a worker processes it in chat order
+    if not update_queue.submit(body):
+        logger.warning("Webhook overloaded (%d pending), asking Telegram to retry", update_queue.pending)
+        if isinstance(update_id, int):
+            await release_update(bot.id, update_id)
+        return JSONResponse(status_code=503, content={"ok": False})
     return {"ok": True}
 
 
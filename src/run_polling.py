@@ -5,24 +5,36 @@
 """
 import asyncio
 import logging
+from contextlib import suppress
 
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.redis import RedisStorage
 
-from src.config import Settings
+from src.config import get_settings
 from src.db import init_async_engine, set_async_session_factory
 from src.bot.handlers import router as bot_router
-from src.bot.middlewares import DbSessionMiddleware, RequestIdMiddleware
+from src.bot.middlewares import (
+    DbSessionMiddleware,
+    QueryStatsMiddleware,
+    RequestIdMiddleware,
+    UpdateDedupMiddleware,
+)
+from src.bot.shutdown import InFlightMiddleware, close_resources
+from src.services.user_cache import run_invalidation_listener
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def create_bot_and_dp():
-    settings = Settings()
+def create_bot_and_dp(in_flight: InFlightMiddleware | None = None):
+    settings = get_settings()
     storage = RedisStorage.from_url(settings.redis_url)
     bot = Bot(token=settings.telegram_bot_token)
     dp = Dispatcher(storage=storage)
+    if in_flight is not None:
+        dp.update.outer_middleware(in_flight)
+    dp.update.outer_middleware(UpdateDedupMiddleware())
+    dp.update.outer_middleware(QueryStatsMiddleware())
     dp.message.middleware(DbSessionMiddleware())
     dp.message.middleware(RequestIdMiddleware())
     dp.callback_query.middleware(DbSessionMiddleware())
@@ -32,20 +44,29 @@ def create_bot_and_dp():
 
 
 async def main():
-    settings = Settings()
+    settings = get_settings()
     engine = init_async_engine(settings.database_url)
     set_async_session_factory(engine)
 
-    bot, dp = create_bot_and_dp()
+    in_flight = InFlightMiddleware()
+    bot, dp = create_bot_and_dp(in_flight)
 
     # Удаляем webhook, если был — иначе Telegram не отдаст обновления в polling
     await bot.delete_webhook(drop_pending_updates=True)
 
+    invalidation_listener = asyncio.create_task(run_invalidation_listener())
     try:
         logger.info("Long polling started (no webhook needed)")
-        await dp.start_polling(bot)
+        # SIGTERM/SIGINT stop fetching updates; the ones already running are drained below,
+        # so the bot session must outlive start_polling.
+        await dp.start_polling(bot, close_bot_session=False)
     finally:
-        await engine.dispose()
+        logger.info("Shutting down: draining %d running updates", len(in_flight.tasks))
+        await in_flight.drain(settings.shutdown_drain_timeout_seconds)
+        invalidation_listener.cancel()
+        with suppress(asyncio.CancelledError):
+            await invalidation_listener
+        await close_resources(bot, dp.storage, engine)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,16 @@
 """Celery app with Redis broker."""
+import logging
+
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import task_postrun, task_prerun
+
+from src.config import get_settings
+from src.db.query_stats import begin_tracking, end_tracking
 
-from src.config import Settings
+logger = logging.getLogger(__name__)
 
-settings = Settings()
+settings = get_settings()
 
 app = Celery(
     "planning_bot",
@@ -29,5 +35,36 @@ app.conf.update(
             "task": "src.scheduler.tasks.dispatch_custom_reminders",
             "schedule": crontab(minute="*"),
         },
+        "archive-old-plans": {
+            "task": "src.scheduler.tasks.archive_old_plans",
+            "schedule": crontab(hour=3, minute=30),
+        },
+        "rollup-global-stats": {
+            "task": "src.scheduler.tasks.rollup_global_stats",
+            "schedule": crontab(minute=5),
+        },
     },
 )
+
+
+_task_query_stats: dict[str, tuple] = {}
+
+
+@task_prerun.connect
+def _start_query_tracking(task_id=None, **kwargs):
+    _task_query_stats[task_id] = begin_tracking()
+
+
+@task_postrun.connect
+def _finish_query_tracking(task_id=None, task=None, **kwargs):
+    tracked = _task_query_stats.pop(task_id, None)
+    if tracked is None:
+        return
+    stats, token = tracked
+    end_tracking(token)
+    logger.info(
+        "task=%s queries=%d db_time_ms=%.1f",
+        task.name if task else task_id,
+        stats.count,
+        stats.duration_ms,
+    )
@@ -9,8 +9,9 @@ from sqlalchemy import select, func, update, or_
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import selectinload
 
-from src.config import Settings
+from src.config import get_settings
 from src.db.models import User, Plan, Task, NotificationLog, CustomReminder
+from src.db.query_stats import instrument_engine
 from src.bot.text import MORNING_PROMPT, REMINDER_MORNING, REMINDER_EVENING
 from src.bot.keyboards import morning_reply_keyboard, evening_inline_keyboard
 from src.bot.text import format_evening_plan
@@ -22,6 +23,10 @@ from src.services.notifications import (
     STATUS_FAILED,
     STATUS_RETRIED,
 )
+from src.services.archive import archive_boundary, archive_plans_before
+from src.services.changes import KIND_REMINDER, publish_changes, record_change
+from src.services.global_stats import rollup_day
+from src.services.reminders import EVENT_FAILED, EVENT_SENT, record_reminder_event
 from src.scheduler.celery_app import app
 from src.scheduler.fsm_helper import set_awaiting_plan, set_awaiting_confirmation
 
@@ -37,8 +42,8 @@ def _is_non_retryable_telegram_error(exc: BaseException) -> bool:
 
 
 def _get_async_session():
-    settings = Settings()
-    engine = create_async_engine(settings.database_url, pool_pre_ping=True)
+    settings = get_settings()
+    engine = instrument_engine(create_async_engine(settings.database_url, pool_pre_ping=True))
     factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
     return factory, engine
 
@@ -86,7 +91,7 @@ async def _send_error_to_user(user_id: int, notification_type: str, error_text:
     finally:
         await engine.dispose()
 
-    settings = Settings()
+    settings = get_settings()
     bot = Bot(token=settings.telegram_bot_token)
     try:
         ntype = "утреннее" if notification_type == "morning" else "вечернее"
@@ -101,7 +106,7 @@ async def _send_error_to_user(user_id: int, notification_type: str, error_text:
 
 
 async def _send_morning(user_id: int, plan_date: date, attempt_count: int) -> None:
-    settings = Settings()
+    settings = get_settings()
     factory, engine = _get_async_session()
     async with factory() as session:
         r = await session.execute(select(User).where(User.id == user_id))
@@ -148,7 +153,7 @@ async def _send_morning(user_id: int, plan_date: date, attempt_count: int) -> No
 
 
 async def _send_evening(user_id: int, plan_date: date, attempt_count: int) -> None:
-    settings = Settings()
+    settings = get_settings()
     factory, engine = _get_async_session()
     text = None
     task_ids = []
@@ -193,7 +198,7 @@ async def _send_evening(user_id: int, plan_date: date, attempt_count: int) -> No
         await bot.send_message(
             telegram_id,
             text,
-            reply_markup=evening_inline_keyboard(tasks_kb),
+            reply_markup=evening_inline_keyboard(tasks_kb, plan_id),
         )
         factory2, engine2 = _get_async_session()
         async with factory2() as session:
@@ -281,7 +286,7 @@ def send_morning_reminder(user_id: int, plan_date: str, reminder_attempt: int =
         await engine.dispose()
         if not should_send or telegram_id is None:
             return
-        settings = Settings()
+        settings = get_settings()
         bot = Bot(token=settings.telegram_bot_token)
         payload_sent = {"date": d.isoformat(), "reminder_attempt": reminder_attempt}
         try:
@@ -370,7 +375,7 @@ def send_evening_reminder(user_id: int, plan_date: str):
                 await engine.dispose()
                 return
         await engine.dispose()
-        settings = Settings()
+        settings = get_settings()
         bot = Bot(token=settings.telegram_bot_token)
         try:
             await bot.send_message(user.telegram_id, REMINDER_EVENING)
@@ -383,7 +388,7 @@ def send_evening_reminder(user_id: int, plan_date: str):
 def _get_dispatch_window() -> int:
     """Return configured dispatch window in minutes (from env DISPATCH_WINDOW_MINUTES, default 10)."""
     try:
-        return max(1, int(Settings().dispatch_window_minutes))
+        return max(1, int(get_settings().dispatch_window_minutes))
     except Exception:
         return 10
 
@@ -521,7 +526,7 @@ def send_custom_reminder(self, reminder_id: int):
                 user = reminder.user
                 if not user.telegram_id:
                     return
-                settings = Settings()
+                settings = get_settings()
                 bot = Bot(token=settings.telegram_bot_token)
                 try:
                     from src.bot.keyboards import custom_reminder_inline_keyboard, main_menu_keyboard
@@ -555,11 +560,17 @@ def send_custom_reminder(self, reminder_id: int):
                             now_utc + timedelta(minutes=reminder.repeat_interval_minutes)
                         ).replace(tzinfo=None)
                     reminder.locked_until_utc = None
+                    record_reminder_event(session, reminder.id, user.id, EVENT_SENT)
+                    record_change(session, user.id, KIND_REMINDER)
                     await session.commit()
+                    await publish_changes(session)
                 except Exception as e:
                     logger.exception("Failed to send custom reminder %s: %s", reminder_id, e)
                     reminder.locked_until_utc = None
+                    record_reminder_event(session, reminder.id, user.id, EVENT_FAILED)
+                    record_change(session, user.id, KIND_REMINDER)
                     await session.commit()
+                    await publish_changes(session)
                     raise
                 finally:
                     await bot.session.close()
@@ -576,3 +587,43 @@ def send_custom_reminder(self, reminder_id: int):
             self.retry(exc=exc, countdown=60)
         except self.MaxRetriesExceededError:
             pass
+
+
+@app.task
+def archive_old_plans():
+    """Daily: move plans of months older than ARCHIVE_AFTER_DAYS into plan_archive, batch by batch."""
+    async def _run():
+        boundary = archive_boundary(date.today(), get_settings().archive_after_days)
+        factory, engine = _get_async_session()
+        total = 0
+        try:
+            while True:
+                async with factory() as session:
+                    archived = await archive_plans_before(session, boundary)
+                    await session.commit()
+                if not archived:
+                    break
+                total += archived
+            logger.info("archive_old_plans: archived %d plan(s) before %s", total, boundary)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(_run())
+
+
+@app.task
+def rollup_global_stats(days_back: int = 1):
+    """Hourly: recompute daily_global_stats for today and the previous `days_back` days."""
+    async def _run():
+        today = date.today()
+        factory, engine = _get_async_session()
+        try:
+            async with factory() as session:
+                for offset in range(days_back, -1, -1):
+                    await rollup_day(session, today - timedelta(days=offset))
+                await session.commit()
+            logger.info("rollup_global_stats: %d day(s) up to %s", days_back + 1, today)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(_run())
@@ -0,0 +1,122 @@
+"""Cold storage: compact old plans into per-user, per-month plan_archive rows."""
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.db.models import Plan, PlanArchive, Task
+from src.services.evening import completion_percent
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def archive_boundary(today: date, archive_after_days: int) -> date:
+    """First day of the month containing (today - archive_after_days); plans before it are archivable."""
+    cutoff = today - timedelta(days=max(0, archive_after_days))
+    return cutoff.replace(day=1)
+
+
+def _plan_entry(plan: Plan) -> dict:
+    tasks = []
+    done = 0.0
+    for t in sorted(plan.tasks, key=lambda x: x.position):
+        ts = t.status
+        if ts and ts.status_enum == "done":
+            done += 1
+        elif ts and ts.status_enum == "partial":
+            done += 0.5
+        tasks.append(
+            {
+                "text": t.text,
+                "status": ts.status_enum if ts else None,
+                "comment": ts.comment if ts else None,
+                "responded_at": ts.responded_at.isoformat() if ts else None,
+            }
+        )
+    return {"date": plan.date.isoformat(), "percent": completion_percent(done, len(tasks)), "tasks": tasks}
+
+
+async def archive_plans_before(session: AsyncSession, boundary: date, limit: int = ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Move up to `limit` plans dated before `boundary` into plan_archive and delete them from the hot tables.
+    Days are merged into an existing archive row for the same user+month, so batches may split a month.
+    Returns the number of archived plans (0 when nothing is left).
+    """
+    r = await session.execute(
+        select(Plan)
+        .where(Plan.date < boundary)
+        .options(selectinload(Plan.tasks).selectinload(Task.status))
+        .order_by(Plan.user_id, Plan.date)
+        .limit(limit)
+    )
+    plans = list(r.scalars().all())
+    if not plans:
+        return 0
+
+    groups: dict[tuple[int, date], dict[str, dict]] = {}
+    for plan in plans:
+        key = (plan.user_id, plan.date.replace(day=1))
+        groups.setdefault(key, {})[plan.date.isoformat()] = _plan_entry(plan)
+
+    r = await session.execute(
+        select(PlanArchive).where(tuple_(PlanArchive.user_id, PlanArchive.month).in_(list(groups)))
+    )
+    for archive in r.scalars().all():
+        days = groups[(archive.user_id, archive.month)]
+        for entry in archive.payload.get("plans", []):
+            days.setdefault(entry["date"], entry)
+
+    now = datetime.utcnow()
+    rows = []
+    for (user_id, month), days in groups.items():
+        entries = [days[d] for d in sorted(days)]
+        rows.append(
+            {
+                "user_id": user_id,
+                "month": month,
+                "plan_count": len(entries),
+                "percent_sum": sum(e["percent"] for e in entries),
+                "payload": {"plans": entries},
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+    stmt = pg_insert(PlanArchive).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PlanArchive.user_id, PlanArchive.month],
+        set_={
+            "plan_count": stmt.excluded.plan_count,
+            "percent_sum": stmt.excluded.percent_sum,
+            "payload": stmt.excluded.payload,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await session.execute(stmt)
+    await session.execute(
+        delete(Plan).where(Plan.id.in_([p.id for p in plans])).execution_options(synchronize_session=False)
+    )
+    for plan in plans:
+        session.expunge(plan)
+    return len(plans)
+
+
+async def get_archived_entries(session: AsyncSession, user_id: int, first: date, last: date) -> list[dict]:
+    """Archived day entries ({"date", "percent", "tasks"}) with first <= date <= last, oldest first."""
+    r = await session.execute(
+        select(PlanArchive.payload)
+        .where(
+            PlanArchive.user_id == user_id,
+            PlanArchive.month >= first.replace(day=1),
+            PlanArchive.month <= last,
+        )
+        .order_by(PlanArchive.month)
+    )
+    first_iso, last_iso = first.isoformat(), last.isoformat()
+    return [
+        entry
+        for payload in r.scalars().all()
+        for entry in payload.get("plans", [])
+        if first_iso <= entry["date"] <= last_iso
+    ]
@@ -0,0 +1,129 @@
+"""Redis-backed per-user read cache, keyed by a per-user data version.
+
+Mutations bump the version (see src.services.changes), which makes every cached entry
+of that user unreachable at once; stale entries simply expire by TTL.
+Redis errors never break a request: reads fall through to the loader.
+"""
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import Any, TypeVar
+from weakref import WeakKeyDictionary
+
+from redis.asyncio import Redis
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DATA_VERSION_KEY = "user:{user_id}:data_version"
+CACHE_KEY = "cache:user:{user_id}:v{version}:{name}"
+DATA_VERSION_TTL_SECONDS = 30 * 24 * 3600
+
+
+@dataclass
+class CacheCounters:
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+counters = CacheCounters()
+
+_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, dict[bool, Redis]]" = WeakKeyDictionary()
+
+
+def _client(decode_responses: bool) -> Redis:
+    """Redis client bound to the running event loop (Celery runs each task in a fresh loop)."""
+    loop = asyncio.get_running_loop()
+    clients = _clients.setdefault(loop, {})
+    client = clients.get(decode_responses)
+    if client is None:
+        client = Redis.from_url(
+            get_settings().redis_url,
+            decode_responses=decode_responses,
+            socket_connect_timeout=1,
+            socket_timeout=1,
+        )
+        clients[decode_responses] = client
+    return client
+
+
+def get_redis() -> Redis:
+    return _client(True)
+
+
+def get_binary_redis() -> Redis:
+    """Client returning raw bytes (bitmaps)."""
+    return _client(False)
+
+
+async def close_redis() -> None:
+    """Close the clients of the running event loop (on shutdown)."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+async def get_data_version(user_id: int) -> int:
+    value = await get_redis().get(DATA_VERSION_KEY.format(user_id=user_id))
+    return int(value or 0)
+
+
+async def bump_data_version(*user_ids: int) -> None:
+    if not user_ids:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for user_id in user_ids:
+            key = DATA_VERSION_KEY.format(user_id=user_id)
+            pipe.incr(key)
+            pipe.expire(key, DATA_VERSION_TTL_SECONDS)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning("Failed to bump data version for users %s: %s", user_ids, e)
+
+
+async def cached_json(
+    user_id: int,
+    name: str,
+    loader: Callable[[], Awaitable[T]],
+    *,
+    encode: Callable[[T], Any] = lambda v: v,
+    decode: Callable[[Any], T] = lambda v: v,
+) -> T:
+    """
+    Return the cached value of `name` for the user's current data version, or compute it with
+    `loader`, store it and return it. encode/decode convert to and from JSON-compatible data.
+    """
+    ttl = get_settings().stats_cache_ttl_seconds
+    if ttl <= 0:
+        return await loader()
+    try:
+        redis = get_redis()
+        version = await get_data_version(user_id)
+        key = CACHE_KEY.format(user_id=user_id, version=version, name=name)
+        raw = await redis.get(key)
+    except Exception as e:
+        counters.errors += 1
+        logger.warning("Cache read failed for user_id=%s %s: %s", user_id, name, e)
+        return await loader()
+    if raw is not None:
+        counters.hits += 1
+        return decode(json.loads(raw))
+
+    counters.misses += 1
+    value = await loader()
+    try:
+        await redis.set(key, json.dumps(encode(value)), ex=ttl)
+    except Exception as e:
+        counters.errors += 1
+        logger.warning("Cache write failed for user_id=%s %s: %s", user_id, name, e)
+    return value
@@ -0,0 +1,76 @@
+"""Change log for user data: services record changes, they are published after commit.
+
+Services call record_change() next to their writes. Recorded changes become "committed" only
+when the session transaction commits (a rollback discards them); publish_changes() then bumps
+the per-user data version that invalidates cached reads and pushes change events to open WebApps.
+"""
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.services.cache import bump_data_version
+from src.services.events import publish_user_events
+from src.services.history_cache import invalidate_history_months
+from src.services.user_cache import publish_user_invalidation
+
+KIND_PLAN = "plan"
+KIND_STATUS = "status"
+KIND_REMINDER = "reminder"
+KIND_SETTINGS = "settings"
+
+_PENDING_KEY = "pending_changes"
+_COMMITTED_KEY = "committed_changes"
+
+
+def record_change(session, user_id: int, kind: str, day: date | None = None) -> None:
+    """
+    Remember that `kind` data of user_id changed in the current transaction (Session or AsyncSession).
+    `day` is the plan date whose completion may have changed.
+    """
+    session.info.setdefault(_PENDING_KEY, set()).add((user_id, kind, day))
+
+
+@event.listens_for(Session, "after_commit")
+def _promote_pending_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        session.info.setdefault(_COMMITTED_KEY, set()).update(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def has_pending_change(session, user_id: int, kind: str) -> bool:
+    """True if the current (uncommitted) transaction recorded a `kind` change for user_id."""
+    return any(u == user_id and k == kind for u, k, _day in session.info.get(_PENDING_KEY, ()))
+
+
+def pop_committed_changes(session) -> set[tuple[int, str, date | None]]:
+    return session.info.pop(_COMMITTED_KEY, None) or set()
+
+
+async def publish_changes(session) -> None:
+    """
+    Invalidate cached reads of every user whose changes were committed in this session, refresh
+    their day bitmap cells and notify their open WebApps. Call after commit; the session is used for reads only.
+    """
+    # Imported here: day_bitmap depends on services that record changes.
+    from src.services.day_bitmap import refresh_day_cells
+
+    changes = pop_committed_changes(session)
+    if not changes:
+        return
+    # Derived state first, version last: a read that sees the new version must not rebuild its
+    # cache entry from a stale bitmap and keep it under that version.
+    days = {(user_id, day) for user_id, _kind, day in changes if day is not None}
+    if days:
+        await refresh_day_cells(session, days)
+        await invalidate_history_months(changes)
+    await bump_data_version(*sorted({user_id for user_id, _kind, _day in changes}))
+    settings_changed = {user_id for user_id, kind, _day in changes if kind == KIND_SETTINGS}
+    if settings_changed:
+        await publish_user_invalidation(settings_changed)
+    await publish_user_events(changes)
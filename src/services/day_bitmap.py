@@ -0,0 +1,155 @@
+"""
+Per-user day bitmap in Redis: one 2-bit cell per day since EPOCH (0 = no plan, 1 = partial, 2 = 100%).
+
+A year fits in ~92 bytes, so streaks and calendars read one small blob instead of scanning plans.
+Cells are refreshed after commit for the (user, date) pairs recorded in src.services.changes;
+a missing bitmap is rebuilt lazily from the database on first read.
+"""
+import logging
+from collections.abc import Iterable
+from datetime import date
+
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import Plan
+from src.services.archive import get_archived_entries
+from src.services.cache import get_binary_redis
+from src.services.evening import plan_completion_select
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(2020, 1, 1)
+NO_PLAN = 0
+PARTIAL_DAY = 1
+FULL_DAY = 2
+
+BITMAP_KEY = "user:{user_id}:days"
+READY_KEY = "user:{user_id}:days:ready"
+BITMAP_TTL_SECONDS = 30 * 24 * 3600
+
+
+def day_index(d: date) -> int:
+    return (d - EPOCH).days
+
+
+def cell_for(percent: int | None) -> int:
+    if percent is None:
+        return NO_PLAN
+    return FULL_DAY if percent >= 100 else PARTIAL_DAY
+
+
+def _get_cell(blob: bytes, index: int) -> int:
+    # Same layout as BITFIELD u2 #index: big-endian bits, four cells per byte.
+    byte = index // 4
+    if index < 0 or byte >= len(blob):
+        return NO_PLAN
+    return (blob[byte] >> (6 - 2 * (index % 4))) & 0b11
+
+
+def encode_cells(cells: dict[int, int]) -> bytes:
+    """Pack {day index: cell} into a bitmap blob."""
+    indexes = [i for i, cell in cells.items() if i >= 0 and cell]
+    if not indexes:
+        return b""
+    blob = bytearray(max(indexes) // 4 + 1)
+    for i in indexes:
+        blob[i // 4] |= (cells[i] & 0b11) << (6 - 2 * (i % 4))
+    return bytes(blob)
+
+
+def decode_cells(blob: bytes, start: int, count: int) -> list[int]:
+    """Cells for day indexes start .. start + count - 1 (beyond the blob: no plan)."""
+    return [_get_cell(blob, i) for i in range(start, start + count)]
+
+
+def trailing_run(blob: bytes, end: int, cell: int = FULL_DAY) -> int:
+    """Number of consecutive `cell` values ending at day index `end`."""
+    n = 0
+    while end - n >= 0 and _get_cell(blob, end - n) == cell:
+        n += 1
+    return n
+
+
+async def _rebuild(session: AsyncSession, user_id: int) -> bytes:
+    r = await session.execute(plan_completion_select(Plan.user_id == user_id, Plan.date >= EPOCH))
+    cells = {day_index(d): cell_for(int(percent)) for d, _total, _done, percent in r.all()}
+    for entry in await get_archived_entries(session, user_id, EPOCH, date.max):
+        cells.setdefault(day_index(date.fromisoformat(entry["date"])), cell_for(entry["percent"]))
+    blob = encode_cells(cells)
+    pipe = get_binary_redis().pipeline(transaction=True)
+    pipe.set(BITMAP_KEY.format(user_id=user_id), blob, ex=BITMAP_TTL_SECONDS)
+    pipe.set(READY_KEY.format(user_id=user_id), 1, ex=BITMAP_TTL_SECONDS)
+    await pipe.execute()
+    return blob
+
+
+async def get_day_bitmap(session: AsyncSession, user_id: int) -> bytes | None:
+    """The user's bitmap, rebuilt if missing; None if Redis is unavailable."""
+    try:
+        pipe = get_binary_redis().pipeline(transaction=False)
+        pipe.exists(READY_KEY.format(user_id=user_id))
+        pipe.get(BITMAP_KEY.format(user_id=user_id))
+        ready, blob = await pipe.execute()
+        if not ready:
+            return await _rebuild(session, user_id)
+        return blob or b""
+    except Exception as e:
+        logger.warning("Day bitmap unavailable for user_id=%s: %s", user_id, e)
+        return None
+
+
+async def get_day_cells(session: AsyncSession, user_id: int, first: date, last: date) -> list[int] | None:
+    blob = await get_day_bitmap(session, user_id)
+    if blob is None:
+        return None
+    return decode_cells(blob, day_index(first), (last - first).days + 1)
+
+
+async def get_current_streak(session: AsyncSession, user_id: int, today: date) -> int | None:
+    """Consecutive 100% days ending today; None if Redis is unavailable."""
+    blob = await get_day_bitmap(session, user_id)
+    if blob is None:
+        return None
+    return trailing_run(blob, day_index(today))
+
+
+async def refresh_day_cells(session: AsyncSession, days: Iterable[tuple[int, date]]) -> None:
+    """Recompute cells for (user_id, date) pairs with one GROUP BY and write them with BITFIELD SET."""
+    days = [(user_id, d) for user_id, d in days if d >= EPOCH]
+    if not days:
+        return
+    by_user: dict[int, list[date]] = {}
+    for user_id, d in days:
+        by_user.setdefault(user_id, []).append(d)
+    try:
+        r = await session.execute(
+            plan_completion_select(tuple_(Plan.user_id, Plan.date).in_(days)).add_columns(Plan.user_id)
+        )
+        percents = {(user_id, d): int(percent) for d, _total, _done, percent, user_id in r.all()}
+    except Exception as e:
+        # Runs after commit: the write stands, so drop the bitmaps and let the next read rebuild them.
+        logger.warning("Failed to read day completion for users %s: %s; dropping their bitmaps", sorted(by_user), e)
+        await _drop_bitmaps(by_user)
+        return
+    try:
+        pipe = get_binary_redis().pipeline(transaction=False)
+        for user_id, dates in by_user.items():
+            key = BITMAP_KEY.format(user_id=user_id)
+            op = pipe.bitfield(key)
+            for d in dates:
+                op.set("u2", f"#{day_index(d)}", cell_for(percents.get((user_id, d))))
+            op.execute()
+            pipe.expire(key, BITMAP_TTL_SECONDS)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning("Failed to refresh day bitmap for users %s: %s", sorted(by_user), e)
+
+
+async def _drop_bitmaps(user_ids: Iterable[int]) -> None:
+    """Forget the users' bitmaps; get_day_bitmap rebuilds them from the DB on next read."""
+    keys = [key.format(user_id=user_id) for user_id in user_ids for key in (READY_KEY, BITMAP_KEY)]
+    try:
+        await get_binary_redis().delete(*keys)
+    except Exception as e:
+        logger.warning("Failed to drop day bitmaps %s: %s", keys, e)
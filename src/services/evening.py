@@ -1,10 +1,14 @@
 """Evening review: task statuses and comments."""
+import math
 from datetime import datetime
 
-from sqlalchemy import select
+from sqlalchemy import DateTime, Integer, Numeric, Text, case, cast, column, func, literal, select, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from src.db.models import Task, TaskStatus
+from src.db.models import Plan, Task, TaskStatus
+from src.services.changes import KIND_STATUS, record_change
 
 # Status enum values
 DONE = "done"
@@ -12,40 +16,190 @@ PARTIAL = "partial"
 FAILED = "failed"
 
 
+def completion_percent(done: float, total: int) -> int:
+    """Percent of `total` tasks done, halves rounded up like Postgres round(numeric) in plan_completion_select."""
+    return math.floor(100 * done / total + 0.5) if total else 0
+
+
+def plan_completion_select(*where):
+    """
+    Per-plan (date, total, done, percent) in one GROUP BY over task/task_status; done = 1, partial = 0.5.
+    `where` filters plans, e.g. Plan.user_id == user_id.
+    """
+    done_weight = case(
+        (TaskStatus.status_enum == DONE, 1.0),
+        (TaskStatus.status_enum == PARTIAL, 0.5),
+        else_=0.0,
+    )
+    total = func.count(Task.id)
+    done = func.coalesce(func.sum(done_weight), 0)
+    return (
+        select(
+            Plan.date.label("date"),
+            total.label("total"),
+            done.label("done"),
+            # numeric, not float: round() then takes halves away from zero, as completion_percent does
+            case((total > 0, func.round(100 * cast(done, Numeric) / total)), else_=0).label("percent"),
+        )
+        .select_from(Plan)
+        .outerjoin(Task, Task.plan_id == Plan.id)
+        .outerjoin(TaskStatus, TaskStatus.task_id == Task.id)
+        .where(*where)
+        .group_by(Plan.id, Plan.date)
+    )
+
+
+def _owned_task_source(task_id: int, user_id: int | None, *columns):
+    """SELECT producing the row to upsert; yields nothing if the task does not belong to user_id."""
+    q = select(Task.id, *columns).where(Task.id == task_id)
+    if user_id is not None:
+        q = q.join(Plan, Plan.id == Task.plan_id).where(Plan.user_id == user_id)
+    return q
+
+
+def _status_insert(source):
+    return pg_insert(TaskStatus).from_select(["task_id", "status_enum", "comment", "responded_at"], source)
+
+
+async def _execute_upsert(session: AsyncSession, stmt) -> TaskStatus | None:
+    """
+    Run the upsert and read the task's owner and plan date in the same round trip:
+    WITH upserted AS (INSERT ... RETURNING *) SELECT upserted.*, plan.user_id, plan.date ...
+    """
+    upserted = stmt.returning(*TaskStatus.__table__.c).cte("upserted")
+    row = aliased(TaskStatus, upserted)
+    r = await session.execute(
+        select(row, Plan.user_id, Plan.date)
+        .join(Task, Task.id == upserted.c.task_id)
+        .join(Plan, Plan.id == Task.plan_id),
+        execution_options={"populate_existing": True},
+    )
+    result = r.one_or_none()
+    if result is None:
+        return None
+    ts, owner_id, plan_date = result
+    record_change(session, owner_id, KIND_STATUS, plan_date)
+    return ts
+
+
 async def set_task_status(
     session: AsyncSession,
     task_id: int,
     status_enum: str,
     comment: str | None = None,
+    *,
+    user_id: int | None = None,
 ) -> TaskStatus | None:
-    r = await session.execute(select(TaskStatus).where(TaskStatus.task_id == task_id))
-    ts = r.scalar_one_or_none()
-    if ts:
-        ts.status_enum = status_enum
-        if comment is not None:
-            ts.comment = comment
-        ts.responded_at = datetime.utcnow()
-    else:
-        ts = TaskStatus(task_id=task_id, status_enum=status_enum, comment=comment)
-        session.add(ts)
-    await session.flush()
-    return ts
+    """
+    Upsert task status in one statement (INSERT ... ON CONFLICT (task_id) DO UPDATE ... RETURNING).
+    comment=None keeps the existing comment. If user_id is given, the task must belong
+    to one of the user's plans; otherwise nothing is written and None is returned.
+    """
+    source = _owned_task_source(
+        task_id,
+        user_id,
+        literal(status_enum, Text),
+        literal(comment, Text),
+        literal(datetime.utcnow(), DateTime),
+    )
+    stmt = _status_insert(source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TaskStatus.task_id],
+        set_={
+            "status_enum": stmt.excluded.status_enum,
+            "comment": func.coalesce(stmt.excluded.comment, TaskStatus.comment),
+            "responded_at": stmt.excluded.responded_at,
+        },
+    )
+    return await _execute_upsert(session, stmt)
 
 
-async def update_task_comment(session: AsyncSession, task_id: int, comment: str | None) -> TaskStatus | None:
-    """Update only comment; keep existing status."""
-    r = await session.execute(select(TaskStatus).where(TaskStatus.task_id == task_id))
-    ts = r.scalar_one_or_none()
-    if ts:
-        ts.comment = comment
-        ts.responded_at = datetime.utcnow()
-        await session.flush()
-        return ts
-    # No status yet, create with done
-    ts = TaskStatus(task_id=task_id, status_enum=DONE, comment=comment)
-    session.add(ts)
-    await session.flush()
-    return ts
+async def update_task_comment(
+    session: AsyncSession,
+    task_id: int,
+    comment: str | None,
+    *,
+    user_id: int | None = None,
+) -> TaskStatus | None:
+    """Update only comment; keep existing status (a task without status is created as done)."""
+    source = _owned_task_source(
+        task_id,
+        user_id,
+        literal(DONE, Text),
+        literal(comment, Text),
+        literal(datetime.utcnow(), DateTime),
+    )
+    stmt = _status_insert(source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TaskStatus.task_id],
+        set_={"comment": stmt.excluded.comment, "responded_at": stmt.excluded.responded_at},
+    )
+    return await _execute_upsert(session, stmt)
+
+
+async def _upsert_plan_statuses(session: AsyncSession, plan_id: int, user_id: int, source) -> int | None:
+    """
+    Shared path of bulk status writes: one ownership check on the plan, then one set-based upsert
+    of `source` rows (task_id, status_enum, comment, responded_at); comment NULL keeps the existing one.
+    Returns the number of rows written, or None if the plan does not belong to user_id.
+    """
+    r = await session.execute(select(Plan.date).where(Plan.id == plan_id, Plan.user_id == user_id))
+    plan_date = r.scalar_one_or_none()
+    if plan_date is None:
+        return None
+    stmt = _status_insert(source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TaskStatus.task_id],
+        set_={
+            "status_enum": stmt.excluded.status_enum,
+            "comment": func.coalesce(stmt.excluded.comment, TaskStatus.comment),
+            "responded_at": stmt.excluded.responded_at,
+        },
+    )
+    r = await session.execute(stmt.returning(TaskStatus), execution_options={"populate_existing": True})
+    written = len(r.scalars().all())
+    if written:
+        record_change(session, user_id, KIND_STATUS, plan_date)
+    return written
+
+
+async def set_plan_statuses(
+    session: AsyncSession,
+    plan_id: int,
+    updates: list[tuple[int, str, str | None]],
+    *,
+    user_id: int,
+) -> int | None:
+    """
+    Apply (task_id, status_enum, comment) to tasks of one plan in a single statement.
+    Tasks outside the plan are skipped; for repeated task_ids the last update wins.
+    """
+    latest = {task_id: (status_enum, comment) for task_id, status_enum, comment in updates}
+    if not latest:
+        return 0
+    rows = values(
+        column("task_id", Integer),
+        column("status_enum", Text),
+        column("comment", Text),
+        name="updates",
+    ).data([(task_id, status_enum, comment) for task_id, (status_enum, comment) in latest.items()])
+    source = (
+        select(Task.id, rows.c.status_enum, rows.c.comment, literal(datetime.utcnow(), DateTime))
+        .join(rows, rows.c.task_id == Task.id)
+        .where(Task.plan_id == plan_id)
+    )
+    return await _upsert_plan_statuses(session, plan_id, user_id, source)
+
+
+async def mark_plan_done(session: AsyncSession, plan_id: int, *, user_id: int) -> int | None:
+    """Mark every task of the plan done, keeping comments."""
+    source = select(
+        Task.id,
+        literal(DONE, Text),
+        literal(None, Text),
+        literal(datetime.utcnow(), DateTime),
+    ).where(Task.plan_id == plan_id)
+    return await _upsert_plan_statuses(session, plan_id, user_id, source)
 
 
 async def get_completion_for_plan(session: AsyncSession, plan_id: int) -> tuple[int, int, int]:
@@ -53,8 +207,6 @@ async def get_completion_for_plan(session: AsyncSession, plan_id: int) -> tuple[
     Returns (done_count, total_count, percent).
     'done' counts as full, 'partial' as half, 'failed' as 0.
     """
-    from src.db.models import Task
-
     r = await session.execute(
         select(Task.id, TaskStatus.status_enum)
         .select_from(Task)
@@ -72,5 +224,4 @@ async def get_completion_for_plan(session: AsyncSession, plan_id: int) -> tuple[
             done_count += 1
         elif status == PARTIAL:
             done_count += 0.5
-    percent = int(round(100 * done_count / total))
-    return int(done_count), total, percent
+    return int(done_count), total, completion_percent(done_count, total)
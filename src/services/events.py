@@ -0,0 +1,129 @@
+"""
+Live change events for open WebApps (served as SSE by /api/events).
+
+publish_changes() sends one Redis message per commit listing what changed per user; every replica
+runs one listener (run_event_listener) that hands events to the streams of its local subscribers.
+Events are hints to re-fetch, so a slow subscriber just loses its oldest ones.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from datetime import date
+
+from redis.asyncio import Redis
+
+from src.config import get_settings
+from src.services.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "user_events"
+SUBSCRIBER_QUEUE_SIZE = 32
+LISTENER_RETRY_SECONDS = 5
+
+
+def build_events(changes) -> list[dict]:
+    """Group (user_id, kind, day) changes into one event per user: {"user_id", "kinds", "days"}."""
+    kinds: dict[int, set[str]] = defaultdict(set)
+    days: dict[int, set[date]] = defaultdict(set)
+    for user_id, kind, day in changes:
+        kinds[user_id].add(kind)
+        if day is not None:
+            days[user_id].add(day)
+    return [
+        {"user_id": user_id, "kinds": sorted(kinds[user_id]), "days": [d.isoformat() for d in sorted(days[user_id])]}
+        for user_id in sorted(kinds)
+    ]
+
+
+class EventBroker:
+    """Per-process registry of open event streams by user id."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        self.dropped = 0
+        self.closed = False
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def dispatch(self, event: dict) -> None:
+        for queue in self._subscribers.get(event.get("user_id"), ()):
+            self._put(queue, event)
+
+    def close(self) -> None:
+        """End every open stream (a None item) and refuse new ones; called on shutdown."""
+        self.closed = True
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._put(queue, None)
+
+    def _put(self, queue: asyncio.Queue, item: dict | None) -> None:
+        if queue.full():
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait(item)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "users": len(self._subscribers),
+            "streams": sum(len(queues) for queues in self._subscribers.values()),
+            "dropped": self.dropped,
+        }
+
+
+event_broker = EventBroker()
+
+
+async def publish_user_events(changes) -> None:
+    events = build_events(changes)
+    if not events:
+        return
+    try:
+        await get_redis().publish(EVENTS_CHANNEL, json.dumps(events))
+    except Exception as e:
+        logger.warning("Failed to publish change events for %s: %s", [event["user_id"] for event in events], e)
+
+
+def _dispatch_message(data: str) -> None:
+    try:
+        events = json.loads(data)
+    except ValueError:
+        logger.warning("Ignoring malformed change event message: %r", data[:200])
+        return
+    for event in events:
+        if isinstance(event, dict):
+            event_broker.dispatch(event)
+
+
+async def run_event_listener() -> None:
+    """Forward change events published by any replica to local streams; runs until cancelled."""
+    while True:
+        client = Redis.from_url(get_settings().redis_url, decode_responses=True)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(EVENTS_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    _dispatch_message(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Change event listener failed: %s; retrying", e)
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+        await asyncio.sleep(LISTENER_RETRY_SECONDS)
@@ -0,0 +1,108 @@
+"""Full-history export (CSV / NDJSON), streamed with server-side cursors so memory stays flat."""
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db import session as db_session
+from src.db.models import Plan, PlanArchive, Task, TaskStatus
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_COLUMNS = ("date", "position", "task", "status", "comment", "responded_at")
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+YIELD_PER = 500
+CHUNK_SIZE = 64 * 1024
+
+
+async def iter_export_rows(session: AsyncSession, user_id: int) -> AsyncIterator[dict]:
+    """One dict per task (or per empty plan), oldest first: archived months, then live plans."""
+    archived = await session.stream_scalars(
+        select(PlanArchive.payload)
+        .where(PlanArchive.user_id == user_id)
+        .order_by(PlanArchive.month)
+        .execution_options(yield_per=1)
+    )
+    async for payload in archived:
+        for entry in payload.get("plans", []):
+            if not entry["tasks"]:
+                yield dict.fromkeys(EXPORT_COLUMNS) | {"date": entry["date"]}
+            for position, t in enumerate(entry["tasks"]):
+                yield {
+                    "date": entry["date"],
+                    "position": position,
+                    "task": t["text"],
+                    "status": t["status"],
+                    "comment": t["comment"],
+                    "responded_at": t["responded_at"],
+                }
+
+    rows = await session.stream(
+        select(Plan.date, Task.position, Task.text, TaskStatus.status_enum, TaskStatus.comment, TaskStatus.responded_at)
+        .select_from(Plan)
+        .outerjoin(Task, Task.plan_id == Plan.id)
+        .outerjoin(TaskStatus, TaskStatus.task_id == Task.id)
+        .where(Plan.user_id == user_id)
+        .order_by(Plan.date, Task.position)
+        .execution_options(yield_per=YIELD_PER)
+    )
+    async for d, position, text, status, comment, responded_at in rows:
+        yield {
+            "date": d.isoformat(),
+            "position": position,
+            "task": text,
+            "status": status,
+            "comment": comment,
+            "responded_at": responded_at.isoformat() if responded_at else None,
+        }
+
+
+async def _chunks(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    buf: list[str] = []
+    size = 0
+    async for line in lines:
+        buf.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+async def _csv_lines(rows: AsyncIterator[dict]) -> AsyncIterator[str]:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    async for row in rows:
+        writer.writerow(row)
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    yield out.getvalue()
+
+
+async def _ndjson_lines(rows: AsyncIterator[dict]) -> AsyncIterator[str]:
+    async for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def format_rows(rows: AsyncIterator[dict], fmt: str) -> AsyncIterator[str]:
+    """Encode export rows as CSV (with header) or NDJSON, batched into ~64 KiB chunks."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    lines = _csv_lines(rows) if fmt == "csv" else _ndjson_lines(rows)
+    return _chunks(lines)
+
+
+async def stream_export(user_id: int, fmt: str) -> AsyncIterator[str]:
+    """
+    Export chunks for a user. Uses its own session: the stream outlives request/handler scoped sessions.
+    """
+    if not db_session.async_session_factory:
+        raise RuntimeError("Async session factory not initialized. Call set_async_session_factory(engine) first.")
+    async with db_session.async_session_factory() as session:
+        async for chunk in format_rows(iter_export_rows(session, user_id), fmt):
+            yield chunk
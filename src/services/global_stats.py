@@ -0,0 +1,124 @@
+"""Operator analytics: daily rollup into daily_global_stats and reads of the precomputed rows."""
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import Integer, cast, func, literal, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import DailyGlobalStats, NotificationLog, Plan, ReminderEvent
+from src.services.evening import plan_completion_select
+from src.services.notifications import STATUS_FAILED, STATUS_SENT
+from src.services.reminders import EVENT_DONE, EVENT_FAILED, EVENT_SENT
+
+ROLLUP_COLUMNS = [
+    "day",
+    "active_planners",
+    "plans_created",
+    "tasks_total",
+    "plans_full",
+    "plans_partial",
+    "plans_zero",
+    "avg_percent",
+    "notifications_sent",
+    "notifications_failed",
+    "reminders_sent",
+    "reminders_failed",
+    "reminders_done",
+    "computed_at",
+]
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def rollup_select(day: date):
+    """One SELECT producing the daily_global_stats row for `day` (set-based, no per-user work)."""
+    start, end = _day_bounds(day)
+    percents = plan_completion_select(Plan.date == day).add_columns(Plan.user_id).subquery("plan_percent")
+    completion = select(
+        func.count(percents.c.user_id.distinct()).label("active_planners"),
+        func.coalesce(func.sum(percents.c.total), 0).label("tasks_total"),
+        func.count().filter(percents.c.percent >= 100).label("plans_full"),
+        func.count().filter(percents.c.percent > 0, percents.c.percent < 100).label("plans_partial"),
+        func.count().filter(percents.c.percent <= 0).label("plans_zero"),
+        func.coalesce(func.round(func.avg(percents.c.percent)), 0).label("avg_percent"),
+    ).subquery("completion")
+    created = (
+        select(func.count())
+        .select_from(Plan)
+        .where(Plan.created_at >= start, Plan.created_at < end)
+        .scalar_subquery()
+    )
+    notifications = select(
+        func.count().filter(NotificationLog.status == STATUS_SENT).label("sent"),
+        func.count().filter(NotificationLog.status == STATUS_FAILED).label("failed"),
+    ).where(NotificationLog.created_at >= start, NotificationLog.created_at < end).subquery("notifications")
+    reminders = select(
+        func.count().filter(ReminderEvent.kind == EVENT_SENT).label("sent"),
+        func.count().filter(ReminderEvent.kind == EVENT_FAILED).label("failed"),
+        func.count().filter(ReminderEvent.kind == EVENT_DONE).label("done"),
+    ).where(ReminderEvent.created_at >= start, ReminderEvent.created_at < end).subquery("reminders")
+    return select(
+        literal(day).label("day"),
+        completion.c.active_planners,
+        created.label("plans_created"),
+        cast(completion.c.tasks_total, Integer).label("tasks_total"),
+        completion.c.plans_full,
+        completion.c.plans_partial,
+        completion.c.plans_zero,
+        cast(completion.c.avg_percent, Integer).label("avg_percent"),
+        notifications.c.sent.label("notifications_sent"),
+        notifications.c.failed.label("notifications_failed"),
+        reminders.c.sent.label("reminders_sent"),
+        reminders.c.failed.label("reminders_failed"),
+        reminders.c.done.label("reminders_done"),
+        literal(datetime.utcnow()).label("computed_at"),
+    ).select_from(completion.join(notifications, true()).join(reminders, true()))
+
+
+async def rollup_day(session: AsyncSession, day: date) -> None:
+    """Compute and upsert the daily_global_stats row for `day` with one INSERT ... SELECT."""
+    stmt = pg_insert(DailyGlobalStats).from_select(ROLLUP_COLUMNS, rollup_select(day))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyGlobalStats.day],
+        set_={name: stmt.excluded[name] for name in ROLLUP_COLUMNS if name != "day"},
+    )
+    await session.execute(stmt)
+
+
+def _failure_rate(sent: int, failed: int) -> float:
+    attempts = sent + failed
+    return round(failed / attempts, 4) if attempts else 0.0
+
+
+def serialize_global_stats(row: DailyGlobalStats) -> dict:
+    return {
+        "day": row.day.isoformat(),
+        "active_planners": row.active_planners,
+        "plans_created": row.plans_created,
+        "tasks_total": row.tasks_total,
+        "completion": {"full": row.plans_full, "partial": row.plans_partial, "zero": row.plans_zero},
+        "avg_percent": row.avg_percent,
+        "notifications_sent": row.notifications_sent,
+        "notifications_failed": row.notifications_failed,
+        "failure_rate": _failure_rate(row.notifications_sent, row.notifications_failed),
+        "reminders": {
+            "sent": row.reminders_sent,
+            "failed": row.reminders_failed,
+            "done": row.reminders_done,
+            "failure_rate": _failure_rate(row.reminders_sent, row.reminders_failed),
+        },
+        "computed_at": row.computed_at.isoformat(),
+    }
+
+
+async def get_global_stats(session: AsyncSession, first: date, last: date) -> list[DailyGlobalStats]:
+    """Precomputed rows for first <= day <= last, oldest first."""
+    r = await session.execute(
+        select(DailyGlobalStats)
+        .where(DailyGlobalStats.day >= first, DailyGlobalStats.day <= last)
+        .order_by(DailyGlobalStats.day)
+    )
+    return list(r.scalars().all())
@@ -0,0 +1,80 @@
+"""Long-lived cache of serialized history for months that are over.
+
+A month is immutable once it ended more than `history_immutable_after_days` ago. Its rendered
+response is kept per user under a per-month version that only edits of that month's plans bump
+(see publish_changes), so activity in the current month never evicts it.
+"""
+import logging
+from calendar import monthrange
+from collections.abc import Awaitable, Callable
+from datetime import date
+
+from src.config import get_settings
+from src.services.cache import counters, get_binary_redis
+
+logger = logging.getLogger(__name__)
+
+MONTH_VERSION_KEY = "user:{user_id}:history:{month}:version"
+MONTH_CACHE_KEY = "cache:user:{user_id}:history:{month}:v{version}"
+# Browsers may reuse an immutable month this long without asking again.
+HTTP_MAX_AGE_SECONDS = 24 * 3600
+
+
+def month_key(day: date) -> str:
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def is_immutable_month(year: int, month: int, today: date | None = None) -> bool:
+    today = today or date.today()
+    last = date(year, month, monthrange(year, month)[1])
+    return (today - last).days > get_settings().history_immutable_after_days
+
+
+async def cached_month(user_id: int, month: str, render: Callable[[], Awaitable[bytes]]) -> bytes:
+    """Rendered history of an immutable month from Redis, or render it and keep it for the long TTL."""
+    ttl = get_settings().history_immutable_ttl_seconds
+    if ttl <= 0:
+        return await render()
+    try:
+        redis = get_binary_redis()
+        version = int(await redis.get(MONTH_VERSION_KEY.format(user_id=user_id, month=month)) or 0)
+        key = MONTH_CACHE_KEY.format(user_id=user_id, month=month, version=version)
+        body = await redis.get(key)
+    except Exception as e:
+        counters.errors += 1
+        logger.warning("History month cache read failed for user_id=%s %s: %s", user_id, month, e)
+        return await render()
+    if body is not None:
+        counters.hits += 1
+        return body
+
+    counters.misses += 1
+    body = await render()
+    try:
+        await redis.set(key, body, ex=ttl)
+    except Exception as e:
+        counters.errors += 1
+        logger.warning("History month cache write failed for user_id=%s %s: %s", user_id, month, e)
+    return body
+
+
+async def invalidate_history_months(changes, today: date | None = None) -> None:
+    """Bump the month version of every immutable month touched by (user_id, kind, day) changes."""
+    months = {
+        (user_id, month_key(day))
+        for user_id, _kind, day in changes
+        if day is not None and is_immutable_month(day.year, day.month, today)
+    }
+    if not months:
+        return
+    # Outlives every entry cached under an older version, so a version never goes back to 0 under one.
+    version_ttl = 2 * get_settings().history_immutable_ttl_seconds
+    try:
+        pipe = get_binary_redis().pipeline(transaction=False)
+        for user_id, month in sorted(months):
+            key = MONTH_VERSION_KEY.format(user_id=user_id, month=month)
+            pipe.incr(key)
+            pipe.expire(key, version_ttl)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning("Failed to invalidate history months %s: %s", sorted(months), e)
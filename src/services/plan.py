@@ -1,12 +1,55 @@
 """Plan creation and update. Idempotent by (user_id, date)."""
+from collections import deque
 from datetime import date
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from src.db.models import Plan, Task, User
 from src.logic.plan_parser import parse_plan_lines
+from src.services.changes import KIND_PLAN, record_change
+
+
+def _diff_tasks(
+    existing: list[tuple[int, int, str]],
+    task_texts: list[str],
+) -> tuple[dict[int, int], list[int], list[tuple[int, str]]]:
+    """
+    Match existing (id, position, text) rows against the new task list.
+    Rows are matched first by identical text at the same position, then by text alone
+    (in position order), so unchanged lines keep their id and TaskStatus.
+    Returns (moves {task_id: new_position}, deleted task ids, inserts [(position, text)]).
+    """
+    by_position = {pos: (tid, text) for tid, pos, text in existing}
+    matched: dict[int, int] = {}
+    unmatched_new: list[tuple[int, str]] = []
+    for pos, text in enumerate(task_texts):
+        row = by_position.get(pos)
+        if row and row[1] == text and row[0] not in matched:
+            matched[row[0]] = pos
+        else:
+            unmatched_new.append((pos, text))
+
+    by_text: dict[str, deque[tuple[int, int]]] = {}
+    for tid, pos, text in sorted(existing, key=lambda x: x[1]):
+        if tid not in matched:
+            by_text.setdefault(text, deque()).append((tid, pos))
+
+    moves: dict[int, int] = {}
+    inserts: list[tuple[int, str]] = []
+    for pos, text in unmatched_new:
+        candidates = by_text.get(text)
+        if candidates:
+            tid, old_pos = candidates.popleft()
+            matched[tid] = pos
+            if old_pos != pos:
+                moves[tid] = pos
+        else:
+            inserts.append((pos, text))
+    deletes = [tid for tid, _pos, _text in existing if tid not in matched]
+    return moves, deletes, inserts
 
 
 async def save_plan(
@@ -16,27 +59,49 @@ async def save_plan(
     task_texts: list[str],
 ) -> Plan:
     """
-    Save or update plan for user+date. Replaces existing tasks (idempotent).
+    Save or update plan for user+date (idempotent).
+    Existing tasks are diffed against task_texts: unchanged lines keep their rows and statuses,
+    removed lines are deleted, new lines are inserted with one multi-row INSERT.
     task_texts should already be validated (e.g. from parse_plan_lines).
     """
+    texts = [text.strip()[:500] for text in task_texts]
     r = await session.execute(
-        select(Plan).where(Plan.user_id == user_id, Plan.date == plan_date)
+        select(Plan)
+        .where(Plan.user_id == user_id, Plan.date == plan_date)
+        .options(selectinload(Plan.tasks))
     )
     plan = r.scalar_one_or_none()
     if plan:
-        # Delete existing tasks and replace
-        for t in plan.tasks:
-            await session.delete(t)
-        await session.flush()
+        existing = list(plan.tasks)
     else:
         plan = Plan(user_id=user_id, date=plan_date)
         session.add(plan)
         await session.flush()
-    for i, text in enumerate(task_texts):
-        task = Task(plan_id=plan.id, position=i, text=text.strip()[:500])
-        session.add(task)
-    await session.flush()
-    await session.refresh(plan, ["tasks"])
+        existing = []
+
+    moves, deletes, inserts = _diff_tasks([(t.id, t.position, t.text) for t in existing], texts)
+    by_id = {t.id: t for t in existing}
+    if deletes:
+        await session.execute(
+            delete(Task).where(Task.id.in_(deletes)).execution_options(synchronize_session=False)
+        )
+        for tid in deletes:
+            session.expunge(by_id.pop(tid))
+    if moves:
+        await session.execute(update(Task), [{"id": tid, "position": pos} for tid, pos in moves.items()])
+        for tid, pos in moves.items():
+            set_committed_value(by_id[tid], "position", pos)
+    tasks = list(by_id.values())
+    if inserts:
+        r = await session.scalars(
+            insert(Task).returning(Task),
+            [{"plan_id": plan.id, "position": pos, "text": text} for pos, text in inserts],
+        )
+        for task in r.all():
+            set_committed_value(task, "status", None)
+            tasks.append(task)
+    set_committed_value(plan, "tasks", sorted(tasks, key=lambda t: t.position))
+    record_change(session, user_id, KIND_PLAN, plan_date)
     return plan
 
 
@@ -62,6 +127,17 @@ async def get_plan_by_id(session: AsyncSession, plan_id: int) -> Plan | None:
     return r.scalar_one_or_none()
 
 
+async def get_plan_for_task(session: AsyncSession, task_id: int) -> Plan | None:
+    """Load the plan containing task_id, with tasks and statuses."""
+    r = await session.execute(
+        select(Plan)
+        .join(Task, Task.plan_id == Plan.id)
+        .where(Task.id == task_id)
+        .options(selectinload(Plan.tasks).selectinload(Task.status))
+    )
+    return r.scalar_one_or_none()
+
+
 async def get_task_with_plan(session: AsyncSession, task_id: int) -> Task | None:
     """Load task with plan (plan has id, date, user_id). For access check and plan context."""
     r = await session.execute(
@@ -87,4 +163,5 @@ async def delete_plan(
         return False
     await session.delete(plan)
     await session.flush()
+    record_change(session, user_id, KIND_PLAN, plan_date)
     return True
@@ -3,11 +3,13 @@ import logging
 from datetime import date, datetime, time, timedelta, timezone
 from zoneinfo import ZoneInfo
 
-from sqlalchemy import delete, func, select, update
+from sqlalchemy import Date, cast, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from src.db.models import CustomReminder, User
+from src.db.models import CustomReminder, ReminderEvent, User
+from src.services.cache import cached_json
+from src.services.changes import KIND_REMINDER, record_change
 
 logger = logging.getLogger(__name__)
 
@@ -103,6 +105,7 @@ async def add_custom_reminder(
     )
     session.add(reminder)
     await session.flush()
+    record_change(session, user_id, KIND_REMINDER)
     return reminder
 
 
@@ -115,39 +118,180 @@ async def list_custom_reminders(session: AsyncSession, user_id: int) -> list[Cus
     return list(r.scalars().all())
 
 
-async def get_reminder_stats(session: AsyncSession, user_id: int) -> dict:
-    """Агрегированная статистика по напоминаниям пользователя."""
-    q = select(CustomReminder).where(CustomReminder.user_id == user_id)
-    r_total = await session.execute(select(func.count()).select_from(q.subquery()))
-    total = r_total.scalar() or 0
+REMINDER_LIST_COLUMNS = (
+    CustomReminder.id,
+    CustomReminder.time_of_day,
+    CustomReminder.description,
+    CustomReminder.repeat_interval_minutes,
+    CustomReminder.max_attempts_per_day,
+    CustomReminder.day_of_month,
+    CustomReminder.enabled,
+    CustomReminder.done_today,
+    CustomReminder.attempts_sent_today,
+)
 
-    r_enabled = await session.execute(
-        select(func.count())
-        .select_from(CustomReminder)
-        .where(CustomReminder.user_id == user_id, CustomReminder.enabled == True)
+
+async def list_reminder_rows(session: AsyncSession, user_id: int):
+    """The reminder list as plain rows (no ORM objects), ordered by time of day."""
+    r = await session.execute(
+        select(*REMINDER_LIST_COLUMNS)
+        .where(CustomReminder.user_id == user_id)
+        .order_by(CustomReminder.time_of_day)
     )
-    enabled = r_enabled.scalar() or 0
+    return r.all()
 
-    r_done = await session.execute(
-        select(func.count())
-        .select_from(CustomReminder)
-        .where(CustomReminder.user_id == user_id, CustomReminder.done_today == True)
+
+EVENT_SENT = "sent"
+EVENT_FAILED = "failed"
+EVENT_DONE = "done"
+EVENT_DISABLED = "disabled"
+
+DEFAULT_STATS_DAYS = 30
+
+
+def record_reminder_event(session: AsyncSession, reminder_id: int | None, user_id: int, kind: str) -> None:
+    """Append a reminder event (flushed with the surrounding transaction)."""
+    session.add(ReminderEvent(reminder_id=reminder_id, user_id=user_id, kind=kind))
+
+
+def _utc_bounds(first: date, last: date) -> tuple[datetime, datetime]:
+    return datetime.combine(first, time.min), datetime.combine(last + timedelta(days=1), time.min)
+
+
+def _completion_rate(done: int, days_sent: int) -> float | None:
+    return round(min(1.0, done / days_sent), 3) if days_sent else None
+
+
+def default_stats_range(today: date | None = None) -> tuple[date, date]:
+    last = today or datetime.now(timezone.utc).date()
+    return last - timedelta(days=DEFAULT_STATS_DAYS - 1), last
+
+
+async def get_reminder_stats(
+    session: AsyncSession,
+    user_id: int,
+    first: date | None = None,
+    last: date | None = None,
+) -> dict:
+    """
+    Агрегированная статистика по напоминаниям пользователя: текущие счётчики и события за период
+    (UTC-даты, по умолчанию последние 30 дней). Кэшируется до следующего изменения.
+    """
+    if first is None or last is None:
+        first, last = default_stats_range()
+    return await cached_json(
+        user_id,
+        f"reminder_stats:{first.isoformat()}:{last.isoformat()}",
+        lambda: _compute_reminder_stats(session, user_id, first, last),
     )
-    done_today = r_done.scalar() or 0
 
-    r_sent = await session.execute(
-        select(func.coalesce(func.sum(CustomReminder.attempts_sent_today), 0)).where(
-            CustomReminder.user_id == user_id
+
+async def _compute_reminder_stats(session: AsyncSession, user_id: int, first: date, last: date) -> dict:
+    """One GROUP BY over the user's reminders left-joined with their events in range."""
+    start, end = _utc_bounds(first, last)
+    kind = ReminderEvent.kind
+    r = await session.execute(
+        select(
+            CustomReminder.id,
+            CustomReminder.description,
+            CustomReminder.enabled,
+            CustomReminder.done_today,
+            CustomReminder.attempts_sent_today,
+            func.count(ReminderEvent.id).filter(kind == EVENT_SENT).label("sent"),
+            func.count(ReminderEvent.id).filter(kind == EVENT_FAILED).label("failed"),
+            func.count(ReminderEvent.id).filter(kind == EVENT_DONE).label("done"),
+            func.count(ReminderEvent.id).filter(kind == EVENT_DISABLED).label("disabled_events"),
+            func.count(func.distinct(cast(ReminderEvent.created_at, Date))).filter(kind == EVENT_SENT).label("days_sent"),
+        )
+        .select_from(CustomReminder)
+        .outerjoin(
+            ReminderEvent,
+            (ReminderEvent.reminder_id == CustomReminder.id)
+            & (ReminderEvent.created_at >= start)
+            & (ReminderEvent.created_at < end),
         )
+        .where(CustomReminder.user_id == user_id)
+        .group_by(CustomReminder.id)
+        .order_by(CustomReminder.time_of_day, CustomReminder.id)
     )
-    sent_today = int(r_sent.scalar() or 0)
-
+    rows = r.all()
+    enabled = sum(1 for row in rows if row.enabled)
+    sent = sum(row.sent for row in rows)
+    done = sum(row.done for row in rows)
+    days_sent = sum(row.days_sent for row in rows)
     return {
-        "total": total,
+        "total": len(rows),
         "enabled": enabled,
-        "disabled": total - enabled,
-        "done_today": done_today,
-        "sent_today": sent_today,
+        "disabled": len(rows) - enabled,
+        "done_today": sum(1 for row in rows if row.done_today),
+        "sent_today": sum(row.attempts_sent_today for row in rows),
+        "from": first.isoformat(),
+        "to": last.isoformat(),
+        "sent": sent,
+        "failed": sum(row.failed for row in rows),
+        "done": done,
+        "completion_rate": _completion_rate(done, days_sent),
+        "reminders": [
+            {
+                "id": row.id,
+                "description": row.description,
+                "sent": row.sent,
+                "failed": row.failed,
+                "done": row.done,
+                "disabled": row.disabled_events,
+                "completion_rate": _completion_rate(row.done, row.days_sent),
+            }
+            for row in rows
+        ],
+    }
+
+
+async def get_reminder_history(
+    session: AsyncSession,
+    reminder_id: int,
+    user_id: int,
+    first: date,
+    last: date,
+) -> dict | None:
+    """Per-day event counts of one reminder (one GROUP BY); None if it is not the user's."""
+    reminder = await session.get(CustomReminder, reminder_id)
+    if not reminder or reminder.user_id != user_id:
+        return None
+    start, end = _utc_bounds(first, last)
+    day = cast(ReminderEvent.created_at, Date)
+    kind = ReminderEvent.kind
+    r = await session.execute(
+        select(
+            day.label("day"),
+            func.count().filter(kind == EVENT_SENT).label("sent"),
+            func.count().filter(kind == EVENT_FAILED).label("failed"),
+            func.count().filter(kind == EVENT_DONE).label("done"),
+            func.count().filter(kind == EVENT_DISABLED).label("disabled"),
+        )
+        .where(
+            ReminderEvent.reminder_id == reminder_id,
+            ReminderEvent.created_at >= start,
+            ReminderEvent.created_at < end,
+        )
+        .group_by(day)
+        .order_by(day)
+    )
+    days = [
+        {"date": row.day.isoformat(), "sent": row.sent, "failed": row.failed, "done": row.done, "disabled": row.disabled}
+        for row in r.all()
+    ]
+    done = sum(d["done"] for d in days)
+    days_sent = sum(1 for d in days if d["sent"])
+    return {
+        "id": reminder.id,
+        "description": reminder.description,
+        "from": first.isoformat(),
+        "to": last.isoformat(),
+        "sent": sum(d["sent"] for d in days),
+        "failed": sum(d["failed"] for d in days),
+        "done": done,
+        "completion_rate": _completion_rate(done, days_sent),
+        "days": days,
     }
 
 
@@ -165,6 +309,8 @@ async def delete_custom_reminder(session: AsyncSession, reminder_id: int, user_i
             CustomReminder.user_id == user_id
         )
     )
+    if r.rowcount > 0:
+        record_change(session, user_id, KIND_REMINDER)
     return r.rowcount > 0
 
 
@@ -204,6 +350,7 @@ async def update_custom_reminder(
             )
             reminder.next_fire_at_utc = next_fire_utc
             reminder.cycle_local_date = cycle_date
+    record_change(session, user_id, KIND_REMINDER)
     return True
 
 
@@ -225,6 +372,10 @@ async def toggle_custom_reminder(session: AsyncSession, reminder_id: int, user_i
             reminder.cycle_local_date = cycle_date
             reminder.attempts_sent_today = 0
             reminder.done_today = False
+    if r.rowcount > 0:
+        if not enabled:
+            record_reminder_event(session, reminder_id, user_id, EVENT_DISABLED)
+        record_change(session, user_id, KIND_REMINDER)
     return r.rowcount > 0
 
 
@@ -243,5 +394,6 @@ async def mark_reminder_done_today(session: AsyncSession, reminder_id: int, user
     reminder.cycle_local_date = cycle_date
     reminder.attempts_sent_today = 0
     reminder.locked_until_utc = None
-    
+    record_reminder_event(session, reminder_id, user_id, EVENT_DONE)
+    record_change(session, user_id, KIND_REMINDER)
     return True
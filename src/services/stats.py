@@ -1,12 +1,17 @@
 """Stats: /today, /history YYYY-MM, /stats (percentage, streaks)."""
+from calendar import monthrange
 from datetime import date, timedelta
-from typing import Any
+from typing import Any, NamedTuple
 
-from sqlalchemy import select
+from sqlalchemy import Integer, cast, func, select, true
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from src.db.models import Plan, Task, TaskStatus
+from src.db.models import Plan, PlanArchive, Task
+from src.services.archive import get_archived_entries
+from src.services.cache import cached_json
+from src.services.day_bitmap import get_current_streak
+from src.services.evening import DONE, PARTIAL, completion_percent, plan_completion_select
 
 
 async def get_today_plan(session: AsyncSession, user_id: int) -> Plan | None:
@@ -28,35 +33,73 @@ async def get_plan_for_date(session: AsyncSession, user_id: int, d: date) -> Pla
     return r.scalar_one_or_none()
 
 
-async def get_history(
+class HistoryDay(NamedTuple):
+    date: date
+    done: float  # weighted: done = 1, partial = 0.5
+    total: int
+    percent: int
+
+
+MAX_HISTORY_RANGE_DAYS = 731
+
+
+def _archived_day(entry: dict) -> HistoryDay:
+    done = sum(1.0 if t["status"] == DONE else 0.5 if t["status"] == PARTIAL else 0.0 for t in entry["tasks"])
+    return HistoryDay(date.fromisoformat(entry["date"]), done, len(entry["tasks"]), entry["percent"])
+
+
+async def get_history_range(
     session: AsyncSession,
     user_id: int,
-    year: int,
-    month: int,
-) -> list[tuple[Plan, int, int]]:
+    first: date,
+    last: date,
+) -> list[HistoryDay]:
     """
-    Returns list of (plan, done_count, total) for the month.
+    Per-day completion for first <= date <= last, newest first, without loading ORM objects.
+    Archived months are read from plan_archive.
     """
-    from calendar import monthrange
+    q = plan_completion_select(Plan.user_id == user_id).where(Plan.date >= first, Plan.date <= last).order_by(Plan.date.desc())
+    r = await session.execute(q)
+    days = [HistoryDay(d, float(done), int(total), int(percent)) for d, total, done, percent in r.all()]
+    hot_dates = {d.date for d in days}
+    archived = [
+        day
+        for day in map(_archived_day, await get_archived_entries(session, user_id, first, last))
+        if day.date not in hot_dates
+    ]
+    if archived:
+        days = sorted(days + archived, key=lambda d: d.date, reverse=True)
+    return days
+
+
+def month_bounds(year: int, month: int) -> tuple[date, date]:
     first = date(year, month, 1)
-    last_day = monthrange(year, month)[1]
-    last = date(year, month, last_day)
-    r = await session.execute(
-        select(Plan)
-        .where(Plan.user_id == user_id, Plan.date >= first, Plan.date <= last)
-        .options(selectinload(Plan.tasks).selectinload(Task.status))
-        .order_by(Plan.date.desc())
+    return first, date(year, month, monthrange(year, month)[1])
+
+
+def _encode_history(days: list[HistoryDay]) -> list[list]:
+    return [[d.date.isoformat(), d.done, d.total, d.percent] for d in days]
+
+
+def _decode_history(rows: list[list]) -> list[HistoryDay]:
+    return [HistoryDay(date.fromisoformat(d), done, total, percent) for d, done, total, percent in rows]
+
+
+async def get_history(
+    session: AsyncSession,
+    user_id: int,
+    year: int,
+    month: int,
+) -> list[HistoryDay]:
+    """Returns per-day (date, done, total, percent) for the month, newest first. Cached per data version."""
+    first, last = month_bounds(year, month)
+    return await cached_json(
+        user_id,
+        f"history:{year:04d}-{month:02d}",
+        lambda: get_history_range(session, user_id, first, last),
+        encode=_encode_history,
+        decode=_decode_history,
     )
-    plans = list(r.scalars().all())
-    result = []
-    for plan in plans:
-        total = len(plan.tasks)
-        done = sum(
-            1 if (ts := t.status) and ts.status_enum == "done" else (0.5 if ts and ts.status_enum == "partial" else 0)
-            for t in plan.tasks
-        )
-        result.append((plan, int(done), total))
-    return result
 
 
 async def get_completion_percent_for_plan(session: AsyncSession, plan: Plan) -> int:
@@ -67,49 +110,60 @@ async def get_completion_percent_for_plan(session: AsyncSession, plan: Plan) ->
         1 if (ts := t.status) and ts.status_enum == "done" else (0.5 if ts and ts.status_enum == "partial" else 0)
         for t in plan.tasks
     )
-    return int(round(100 * done / total))
+    return completion_percent(done, total)
 
 
 async def get_stats(
     session: AsyncSession,
     user_id: int,
+) -> dict[str, Any]:
+    """Cached aggregate stats (see _compute_stats); the key includes today because the streak depends on it."""
+    return await cached_json(user_id, f"stats:{date.today().isoformat()}", lambda: _compute_stats(session, user_id))
+
+
+async def _compute_stats(
+    session: AsyncSession,
+    user_id: int,
 ) -> dict[str, Any]:
     """
     Aggregate stats: total plans, completion percent over time, current streak (consecutive days with 100%).
+    Totals come from one query (per-plan percents plus archived per-month sums); the streak is read
+    from the day bitmap, falling back to a gaps-and-islands count in the same query if Redis is down.
     """
-    r = await session.execute(
-        select(Plan)
-        .where(Plan.user_id == user_id)
-        .options(selectinload(Plan.tasks).selectinload(Task.status))
-        .order_by(Plan.date.desc())
-    )
-    plans = list(r.scalars().all())
-    if not plans:
-        return {"total_plans": 0, "avg_percent": 0, "current_streak": 0}
-
-    total_plans = len(plans)
-    percents = []
-    for plan in plans:
-        pct = await get_completion_percent_for_plan(session, plan)
-        percents.append(pct)
-    avg_percent = int(round(sum(percents) / len(percents))) if percents else 0
-
-    # Current streak: consecutive days (from today backwards) with 100% completion
     today = date.today()
-    streak = 0
-    d = today
-    plan_by_date = {p.date: p for p in plans}
-    while True:
-        plan = plan_by_date.get(d)
-        if not plan or not plan.tasks:
-            break
-        pct = await get_completion_percent_for_plan(session, plan)
-        if pct < 100:
-            break
-        streak += 1
-        d -= timedelta(days=1)
+    current_streak = await get_current_streak(session, user_id, today)
+
+    percents = plan_completion_select(Plan.user_id == user_id).cte("plan_percent")
+    hot = select(
+        func.count().label("n"),
+        func.coalesce(func.sum(percents.c.percent), 0).label("s"),
+    ).cte("hot")
+    archived = select(
+        func.coalesce(func.sum(PlanArchive.plan_count), 0).label("n"),
+        func.coalesce(func.sum(PlanArchive.percent_sum), 0).label("s"),
+    ).where(PlanArchive.user_id == user_id).cte("archived")
+    total_plans = hot.c.n + archived.c.n
+    columns = [
+        total_plans.label("total_plans"),
+        func.coalesce(func.round((hot.c.s + archived.c.s) / func.nullif(total_plans, 0)), 0).label("avg_percent"),
+    ]
+    if current_streak is None:
+        # Islands: for consecutive full days ending today, date + row_number (newest first) == today + 1.
+        full_days = select(
+            percents.c.date,
+            func.row_number().over(order_by=percents.c.date.desc()).label("rn"),
+        ).where(percents.c.percent == 100, percents.c.total > 0, percents.c.date <= today).cte("full_days")
+        streak = (
+            select(func.count())
+            .select_from(full_days)
+            .where(full_days.c.date + cast(full_days.c.rn, Integer) == today + timedelta(days=1))
+            .scalar_subquery()
+        )
+        columns.append(streak.label("current_streak"))
+    r = await session.execute(select(*columns).select_from(hot.join(archived, true())))
+    row = r.one()
     return {
-        "total_plans": total_plans,
-        "avg_percent": avg_percent,
-        "current_streak": streak,
+        "total_plans": int(row.total_plans),
+        "avg_percent": int(row.avg_percent),
+        "current_streak": int(row.current_streak if current_streak is None else current_streak),
     }
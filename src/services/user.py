@@ -5,6 +5,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models import User
+from src.services.changes import KIND_SETTINGS, has_pending_change, record_change
+from src.services.user_cache import UserSnapshot, user_cache
 
 
 async def get_user_by_telegram_id(session: AsyncSession, telegram_id: int) -> User | None:
@@ -12,6 +14,29 @@ async def get_user_by_telegram_id(session: AsyncSession, telegram_id: int) -> Us
     return r.scalar_one_or_none()
 
 
+async def get_user_snapshot(session: AsyncSession, telegram_id: int) -> UserSnapshot | None:
+    """
+    Cached read-only user for hot paths (WebApp auth, bot handlers). Use get_user_by_telegram_id
+    when the row itself must be modified.
+    """
+    snapshot = user_cache.get(telegram_id)
+    if snapshot is not None:
+        return snapshot
+    user = await get_user_by_telegram_id(session, telegram_id)
+    if user is None:
+        return None
+    snapshot = UserSnapshot.from_user(user)
+    # Settings changed in this (uncommitted) transaction must not leak into the shared cache.
+    if not has_pending_change(session, user.id, KIND_SETTINGS):
+        user_cache.put(snapshot)
+    return snapshot
+
+
+def _settings_changed(session: AsyncSession, user: User) -> None:
+    user_cache.invalidate_user_ids([user.id])
+    record_change(session, user.id, KIND_SETTINGS)
+
+
 async def get_user_by_id(session: AsyncSession, user_id: int) -> User | None:
     r = await session.execute(select(User).where(User.id == user_id))
     return r.scalar_one_or_none()
@@ -45,6 +70,7 @@ async def update_user_timezone(session: AsyncSession, user_id: int, timezone: st
         return None
     user.timezone = timezone
     await session.flush()
+    _settings_changed(session, user)
     return user
 
 
@@ -66,6 +92,7 @@ async def update_onboarding_flags(
     if evening_confirmed is not None:
         user.onboarding_evening_confirmed = evening_confirmed
     await session.flush()
+    _settings_changed(session, user)
     return user
 
 
@@ -84,6 +111,7 @@ async def update_notify_times(
     if notify_evening_time is not None:
         user.notify_evening_time = notify_evening_time
     await session.flush()
+    _settings_changed(session, user)
     return user
 
 
@@ -102,4 +130,5 @@ async def update_morning_reminder_settings(
     if max_attempts is not None:
         user.morning_reminder_max_attempts = max_attempts
     await session.flush()
+    _settings_changed(session, user)
     return user
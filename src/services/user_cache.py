@@ -0,0 +1,138 @@
+"""
+Per-process cache of immutable user snapshots keyed by telegram_id.
+
+Snapshots are dropped when settings change: locally right away, and on every replica after
+commit via a Redis pub/sub message (see src.services.changes.publish_changes). A short TTL
+bounds staleness if a message is missed.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time as time_module
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime, time
+
+from redis.asyncio import Redis
+
+from src.config import get_settings
+from src.services.cache import get_redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "user_cache:invalidate"
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL_SECONDS = 300
+LISTENER_RETRY_SECONDS = 5
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """Read-only copy of a User row (same attribute names, no session attached)."""
+
+    id: int
+    telegram_id: int
+    timezone: str
+    notify_morning_time: time
+    notify_evening_time: time
+    morning_reminder_interval_minutes: int
+    morning_reminder_max_attempts: int
+    onboarding_tz_confirmed: bool
+    onboarding_morning_confirmed: bool
+    onboarding_evening_confirmed: bool
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_user(cls, user) -> UserSnapshot:
+        return cls(**{f.name: getattr(user, f.name) for f in fields(cls)})
+
+
+class UserSnapshotCache:
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl_seconds: float = USER_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[int, tuple[UserSnapshot, float]] = OrderedDict()
+        self._telegram_ids: dict[int, int] = {}  # user.id -> telegram_id
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, telegram_id: int) -> UserSnapshot | None:
+        entry = self._entries.get(telegram_id)
+        if entry is None or entry[1] < time_module.monotonic():
+            if entry is not None:
+                self._drop(telegram_id)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(telegram_id)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, snapshot: UserSnapshot) -> None:
+        self._entries[snapshot.telegram_id] = (snapshot, time_module.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(snapshot.telegram_id)
+        self._telegram_ids[snapshot.id] = snapshot.telegram_id
+        while len(self._entries) > self.maxsize:
+            telegram_id, (old, _expires) = self._entries.popitem(last=False)
+            self._telegram_ids.pop(old.id, None)
+
+    def _drop(self, telegram_id: int) -> None:
+        entry = self._entries.pop(telegram_id, None)
+        if entry is not None:
+            self._telegram_ids.pop(entry[0].id, None)
+
+    def invalidate_user_ids(self, user_ids) -> None:
+        for user_id in user_ids:
+            telegram_id = self._telegram_ids.get(user_id)
+            if telegram_id is not None:
+                self._drop(telegram_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._telegram_ids.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+user_cache = UserSnapshotCache()
+
+
+async def publish_user_invalidation(user_ids) -> None:
+    """Drop snapshots of user_ids here and ask other replicas to do the same."""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    user_cache.invalidate_user_ids(user_ids)
+    try:
+        await get_redis().publish(INVALIDATION_CHANNEL, ",".join(map(str, user_ids)))
+    except Exception as e:
+        logger.warning("Failed to publish user cache invalidation for %s: %s", user_ids, e)
+
+
+def _parse_user_ids(data: str) -> list[int]:
+    return [int(part) for part in data.split(",") if part.strip().isdigit()]
+
+
+async def run_invalidation_listener() -> None:
+    """Apply invalidations published by any replica; runs until cancelled, reconnecting on errors."""
+    while True:
+        client = Redis.from_url(get_settings().redis_url, decode_responses=True)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Messages may have been missed while disconnected.
+            user_cache.clear()
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    user_cache.invalidate_user_ids(_parse_user_ids(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("User cache invalidation listener failed: %s; retrying", e)
+            user_cache.clear()
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+        await asyncio.sleep(LISTENER_RETRY_SECONDS)
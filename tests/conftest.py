@@ -1,5 +1,7 @@
-"""Pytest fixtures: db, redis, mock telegram."""
+"""Pytest fixtures: db, redis, mock telegram, query budgets."""
 import os
+from contextlib import contextmanager
+
 import pytest
 
 # Set test env before importing app
@@ -23,3 +25,131 @@ def sample_plan_multiline():
     2. Second task
     3) Third
     """
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test if a code path issues more SQL statements than declared.
+    Engines must be instrumented (get_engine does it; use instrument_engine for ad-hoc ones).
+
+        with query_budget(3):
+            await set_status_callback(...)
+    """
+    from src.db.query_stats import track_queries
+
+    @contextmanager
+    def _budget(max_queries: int):
+        with track_queries() as stats:
+            yield stats
+        if stats.count > max_queries:
+            statements = "\n".join(f"  {i}. {s}" for i, s in enumerate(stats.statements, 1))
+            pytest.fail(f"Query budget exceeded: {stats.count} > {max_queries}\n{statements}")
+
+    return _budget
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for a redis.asyncio client with the commands the services use.
+    Values are stored as bytes and returned decoded when decode_responses is set, like the real
+    client; TTLs are recorded in `ttl`, never expired. With fail=True every command raises.
+    """
+
+    def __init__(self, decode_responses: bool = True):
+        self.decode_responses = decode_responses
+        self.fail = False
+        self.data: dict[str, bytes] = {}
+        self.ttl: dict[str, int] = {}
+        self.published: list[tuple[str, str]] = []
+
+    def _check(self) -> None:
+        if self.fail:
+            raise ConnectionError("redis down")
+
+    def _out(self, value: bytes | None):
+        if value is None or not self.decode_responses:
+            return value
+        return value.decode()
+
+    async def get(self, key):
+        self._check()
+        return self._out(self.data.get(key))
+
+    async def set(self, key, value, ex=None, nx=False):
+        self._check()
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        if ex is not None:
+            self.ttl[key] = ex
+        return True
+
+    async def getdel(self, key):
+        self._check()
+        self.ttl.pop(key, None)
+        return self._out(self.data.pop(key, None))
+
+    async def delete(self, *keys):
+        self._check()
+        for key in keys:
+            self.ttl.pop(key, None)
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def incr(self, key):
+        self._check()
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    async def expire(self, key, ttl):
+        self._check()
+        self.ttl[key] = ttl
+        return key in self.data
+
+    async def publish(self, channel, data):
+        self._check()
+        self.published.append((channel, data))
+        return 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands and runs them against the FakeRedis on execute()."""
+
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self):
+        self.redis._check()
+        commands, self.commands = self.commands, []
+        return [await command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """
+    Factory patching Redis client getters with one FakeRedis:
+
+        redis = fake_redis("src.services.cache.get_redis")
+        redis = fake_redis("src.services.history_cache.get_binary_redis", decode_responses=False)
+    """
+    def _patch(*getters: str, decode_responses: bool = True) -> FakeRedis:
+        redis = FakeRedis(decode_responses=decode_responses)
+        for getter in getters:
+            monkeypatch.setattr(getter, lambda: redis)
+        return redis
+
+    return _patch
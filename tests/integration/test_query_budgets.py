@@ -0,0 +1,61 @@
+"""Integration tests: SQL budgets of hot paths (require Postgres at DATABASE_URL)."""
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+pytestmark = pytest.mark.integration
+
+from src.bot.handlers.evening import set_status_callback
+from src.db.models import Plan, Task, User
+from src.db.session import Base, get_engine
+from src.services.user_cache import user_cache
+
+
+@pytest.fixture
+async def session():
+    """Session inside an outer transaction that is rolled back after the test."""
+    engine = get_engine()
+    try:
+        conn = await engine.connect()
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"Postgres unavailable: {e}")
+    trans = await conn.begin()
+    await conn.run_sync(Base.metadata.create_all)
+    session = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        await session.close()
+        await trans.rollback()
+        await conn.close()
+        await engine.dispose()
+
+
+@pytest.fixture
+async def evening_plan(session):
+    user = User(telegram_id=900001)
+    plan = Plan(user=user, date=date(2025, 3, 1))
+    plan.tasks = [Task(position=i, text=f"Задача {i}") for i in range(3)]
+    session.add(plan)
+    await session.flush()
+    return user, plan
+
+
+async def test_evening_status_tap_budget(session, evening_plan, query_budget):
+    """One tap: user (cold cache), status upsert, plan + tasks + statuses, completion."""
+    user, plan = evening_plan
+    user_cache.clear()
+    callback = SimpleNamespace(
+        data=f"task_done_{plan.tasks[0].id}",
+        from_user=SimpleNamespace(id=user.telegram_id),
+        answer=AsyncMock(),
+        message=SimpleNamespace(edit_text=AsyncMock()),
+    )
+    with query_budget(6):
+        await set_status_callback(callback, session, AsyncMock())
+    callback.answer.assert_awaited_with("Сохранено")
+    callback.message.edit_text.assert_awaited_once()
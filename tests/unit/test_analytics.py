@@ -0,0 +1,52 @@
+"""Unit tests for heatmap analytics over dense day arrays."""
+from datetime import date
+
+from src.logic.analytics import dense_series, heatmap, rolling_average, streaks, weekday_profile
+
+MONDAY = date(2025, 1, 6)
+
+
+def test_dense_series_fills_gaps():
+    rows = [(date(2025, 1, 8), 1.5, 2, 75), (date(2025, 1, 6), 1.0, 1, 100), (date(2025, 2, 1), 1.0, 1, 100)]
+    percent, done, total = dense_series(rows, MONDAY, date(2025, 1, 9))
+    assert percent == [100, None, 75, None]
+    assert done == [1.0, 0.0, 1.5, 0.0]
+    assert total == [1, 0, 2, 0]
+
+
+def test_rolling_average_skips_missing_days():
+    assert rolling_average([100, None, 50, 0], 2) == [100.0, 100.0, 50.0, 25.0]
+    assert rolling_average([None, None], 7) == [None, None]
+
+
+def test_streaks():
+    percent = [100, 100, None, 50, 100, 100, 100]
+    result = streaks(percent, MONDAY)
+    assert result["best"] == 3
+    assert result["best_from"] == "2025-01-10"
+    assert result["longest_planned"] == 4
+    assert result["longest_planned_from"] == "2025-01-09"
+    assert result["current"] == 3
+
+
+def test_streaks_empty():
+    result = streaks([None, None], MONDAY)
+    assert result["best"] == 0 and result["best_from"] is None and result["current"] == 0
+
+
+def test_weekday_profile_aligns_to_first_weekday():
+    # Starts on Sunday: index 0 is weekday 6.
+    profile = weekday_profile([40, 100, None, 80], date(2025, 1, 5))
+    assert profile["days"] == [1, 0, 1, 0, 0, 0, 1]
+    assert profile["avg"][6] == 40.0
+    assert profile["avg"][0] == 100.0
+    assert profile["avg"][1] is None
+
+
+def test_heatmap_is_columnar():
+    result = heatmap([(MONDAY, 1.0, 1, 100)], MONDAY, date(2025, 1, 12))
+    assert result["from"] == "2025-01-06" and result["to"] == "2025-01-12"
+    assert len(result["percent"]) == len(result["done"]) == len(result["total"]) == 7
+    assert set(result["rolling"]) == {"7", "30"}
+    assert result["rolling"]["7"][-1] == 100.0
+    assert result["streaks"]["current"] == 0
@@ -0,0 +1,46 @@
+"""Unit tests for plan archive helpers."""
+from datetime import date, datetime
+
+from src.db.models import Plan, Task, TaskStatus
+from src.services.archive import _plan_entry, archive_boundary
+
+
+def test_archive_boundary_is_first_day_of_cutoff_month():
+    assert archive_boundary(date(2026, 3, 15), 30) == date(2026, 2, 1)
+    assert archive_boundary(date(2026, 3, 15), 0) == date(2026, 3, 1)
+
+
+def test_plan_entry_serializes_tasks_in_order():
+    plan = Plan(user_id=1, date=date(2025, 1, 5))
+    done = Task(position=0, text="A")
+    done.status = TaskStatus(status_enum="done", comment="ok", responded_at=datetime(2025, 1, 5, 20, 0))
+    partial = Task(position=1, text="B")
+    partial.status = TaskStatus(status_enum="partial", comment=None, responded_at=datetime(2025, 1, 5, 20, 1))
+    open_task = Task(position=2, text="C")
+    open_task.status = None
+    plan.tasks = [partial, done, open_task]
+
+    entry = _plan_entry(plan)
+    assert entry["date"] == "2025-01-05"
+    assert entry["percent"] == 50
+    assert [t["text"] for t in entry["tasks"]] == ["A", "B", "C"]
+
+    assert entry["tasks"][0] == {
+        "text": "A",
+        "status": "done",
+        "comment": "ok",
+        "responded_at": "2025-01-05T20:00:00",
+    }
+    assert entry["tasks"][2]["status"] is None
+
+
+def test_plan_entry_rounds_halves_like_the_hot_path():
+    # 2 done + partial + open = 2.5 / 4 = 62.5%: plan_completion_select (round(numeric)) gives 63, round() 62.
+    plan = Plan(user_id=1, date=date(2025, 1, 6))
+    statuses = ["done", "done", "partial", None]
+    plan.tasks = []
+    for i, status in enumerate(statuses):
+        task = Task(position=i, text=str(i))
+        task.status = TaskStatus(status_enum=status, responded_at=datetime(2025, 1, 6)) if status else None
+        plan.tasks.append(task)
+    assert _plan_entry(plan)["percent"] == 63
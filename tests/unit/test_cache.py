@@ -0,0 +1,72 @@
+"""Unit tests for the per-user versioned read cache and post-commit change publishing."""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from src.services import cache
+from src.services.changes import KIND_PLAN, pop_committed_changes, record_change
+
+
+@pytest.fixture
+def redis(fake_redis, monkeypatch):
+    monkeypatch.setattr(cache, "counters", cache.CacheCounters())
+    return fake_redis("src.services.cache.get_redis")
+
+
+def _loader(values):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return values[len(calls) - 1]
+
+    return load, calls
+
+
+async def test_cached_json_hit_after_miss(redis):
+    load, calls = _loader([{"total": 1}, {"total": 2}])
+    assert await cache.cached_json(7, "stats", load) == {"total": 1}
+    assert await cache.cached_json(7, "stats", load) == {"total": 1}
+    assert len(calls) == 1
+    assert cache.counters.as_dict() == {"hits": 1, "misses": 1, "errors": 0}
+
+
+async def test_bump_data_version_invalidates_only_that_user(redis):
+    load7, calls7 = _loader([1, 2])
+    load8, calls8 = _loader([10, 20])
+    await cache.cached_json(7, "stats", load7)
+    await cache.cached_json(8, "stats", load8)
+    await cache.bump_data_version(7)
+    assert await cache.cached_json(7, "stats", load7) == 2
+    assert await cache.cached_json(8, "stats", load8) == 10
+    assert (len(calls7), len(calls8)) == (2, 1)
+
+
+async def test_cached_json_encode_decode(redis):
+    load, _ = _loader([(1, 2)])
+    kwargs = {"encode": list, "decode": tuple}
+    assert await cache.cached_json(7, "pair", load, **kwargs) == (1, 2)
+    assert await cache.cached_json(7, "pair", load, **kwargs) == (1, 2)
+
+
+async def test_redis_failure_falls_back_to_loader(redis):
+    redis.fail = True
+    load, calls = _loader([1, 2])
+    assert await cache.cached_json(7, "stats", load) == 1
+    assert await cache.cached_json(7, "stats", load) == 2
+    assert cache.counters.errors == 2
+
+
+def test_changes_promoted_on_commit_and_discarded_on_rollback():
+    engine = create_engine("sqlite://")
+    with Session(engine) as session:
+        session.execute(text("SELECT 1"))
+        record_change(session, 1, KIND_PLAN)
+        session.rollback()
+        assert pop_committed_changes(session) == set()
+
+        session.execute(text("SELECT 1"))
+        record_change(session, 2, KIND_PLAN)
+        session.commit()
+        assert pop_committed_changes(session) == {(2, KIND_PLAN, None)}
+        assert pop_committed_changes(session) == set()
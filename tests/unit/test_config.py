@@ -0,0 +1,65 @@
+"""Unit tests for the cached settings accessor."""
+import timeit
+from datetime import date
+
+import pytest
+
+from src.config import Settings, get_settings, reload_settings
+from src.services.history_cache import is_immutable_month
+
+REQUESTS = 1000
+READS_PER_REQUEST = 5
+
+
+def _request():
+    """Settings reads of one webhook/API request (each of these sites used to call Settings())."""
+    for _ in range(READS_PER_REQUEST - 1):
+        get_settings()
+    is_immutable_month(2024, 1, date(2025, 3, 1))
+
+
+def test_get_settings_is_cached():
+    assert get_settings() is get_settings()
+
+
+def test_reload_settings_rereads_environment(monkeypatch):
+    before = get_settings()
+    monkeypatch.setenv("STATS_CACHE_TTL_SECONDS", "42")
+    try:
+        assert get_settings() is before
+        reloaded = reload_settings()
+        assert reloaded is not before
+        assert reloaded.stats_cache_ttl_seconds == 42
+        assert get_settings() is reloaded
+    finally:
+        monkeypatch.undo()
+        reload_settings()
+
+
+def test_settings_are_built_once_across_requests(monkeypatch):
+    """Benchmark by count: REQUESTS x READS_PER_REQUEST env/.env parses before, one now."""
+    built = 0
+    init = Settings.__init__
+
+    def counting_init(self, *args, **kwargs):
+        nonlocal built
+        built += 1
+        init(self, *args, **kwargs)
+
+    monkeypatch.setattr(Settings, "__init__", counting_init)
+    reload_settings()
+    for _ in range(REQUESTS):
+        _request()
+    assert built == 1
+    monkeypatch.undo()
+    reload_settings()
+
+
+@pytest.mark.benchmark
+def test_report_settings_access_cost():
+    """Reports per-request cost of Settings() vs get_settings(); numbers only, no assertion (run with -s)."""
+    n = 200
+    get_settings()
+    uncached = min(timeit.repeat(Settings, number=n, repeat=3)) / n * READS_PER_REQUEST
+    cached = min(timeit.repeat(_request, number=n, repeat=3)) / n
+    print(f"\nsettings per request: Settings() x{READS_PER_REQUEST} {uncached * 1e6:.1f} us, now {cached * 1e6:.2f} us")
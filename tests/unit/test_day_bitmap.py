@@ -0,0 +1,88 @@
+"""Unit tests for the packed per-user day bitmap."""
+from datetime import date
+from types import SimpleNamespace
+
+from src.services import changes, day_bitmap
+from src.services.day_bitmap import (
+    EPOCH,
+    FULL_DAY,
+    NO_PLAN,
+    PARTIAL_DAY,
+    cell_for,
+    day_index,
+    decode_cells,
+    encode_cells,
+    trailing_run,
+)
+
+
+def test_cell_for():
+    assert cell_for(None) == NO_PLAN
+    assert cell_for(0) == PARTIAL_DAY
+    assert cell_for(99) == PARTIAL_DAY
+    assert cell_for(100) == FULL_DAY
+
+
+def test_layout_matches_redis_bitfield_u2():
+    # BITFIELD SET u2 #0 2 and #5 1 -> bits 10 00 00 00 | 00 01 00 00
+    assert encode_cells({0: FULL_DAY, 5: PARTIAL_DAY}) == bytes([0b10000000, 0b00010000])
+
+
+def test_encode_decode_roundtrip():
+    cells = {3: FULL_DAY, 4: PARTIAL_DAY, 9: FULL_DAY, 10: NO_PLAN}
+    blob = encode_cells(cells)
+    assert decode_cells(blob, 2, 10) == [0, 2, 1, 0, 0, 0, 0, 2, 0, 0]
+    assert encode_cells({}) == b""
+    assert decode_cells(b"", 0, 3) == [0, 0, 0]
+
+
+def test_trailing_run():
+    today = day_index(date(2025, 3, 10))
+    blob = encode_cells({today - 3: PARTIAL_DAY, today - 2: FULL_DAY, today - 1: FULL_DAY, today: FULL_DAY})
+    assert trailing_run(blob, today) == 3
+    assert trailing_run(blob, today + 1) == 0
+    assert trailing_run(encode_cells({0: FULL_DAY}), day_index(EPOCH)) == 1
+
+
+async def test_publish_changes_bumps_version_after_bitmap(monkeypatch):
+    calls = []
+
+    def recorder(name):
+        async def record(*args, **kwargs):
+            calls.append(name)
+        return record
+
+    monkeypatch.setattr(day_bitmap, "refresh_day_cells", recorder("bitmap"))
+    monkeypatch.setattr(changes, "invalidate_history_months", recorder("history"))
+    monkeypatch.setattr(changes, "bump_data_version", recorder("version"))
+    monkeypatch.setattr(changes, "publish_user_events", recorder("events"))
+    session = SimpleNamespace(info={changes._COMMITTED_KEY: {(1, changes.KIND_STATUS, date(2025, 3, 1))}})
+
+    await changes.publish_changes(session)
+    assert calls == ["bitmap", "history", "version", "events"]
+
+
+async def test_publish_changes_survives_failed_bitmap_read(monkeypatch, fake_redis):
+    """The write is already committed: a failing completion read drops the bitmap instead of raising."""
+    calls = []
+    redis = fake_redis("src.services.day_bitmap.get_binary_redis", decode_responses=False)
+    ready, bitmap = day_bitmap.READY_KEY.format(user_id=1), day_bitmap.BITMAP_KEY.format(user_id=1)
+    await redis.set(ready, 1)
+    await redis.set(bitmap, b"\x80")
+
+    class FailingSession:
+        info = {changes._COMMITTED_KEY: {(1, changes.KIND_STATUS, date(2025, 3, 1))}}
+
+        async def execute(self, stmt):
+            raise ConnectionError("db gone")
+
+    async def record(*args, **kwargs):
+        calls.append(args)
+
+    monkeypatch.setattr(changes, "bump_data_version", record)
+    monkeypatch.setattr(changes, "invalidate_history_months", record)
+    monkeypatch.setattr(changes, "publish_user_events", record)
+
+    await changes.publish_changes(FailingSession())
+    assert ready not in redis.data and bitmap not in redis.data
+    assert len(calls) == 3  # history months, data version, events all still ran
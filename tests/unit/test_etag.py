@@ -0,0 +1,71 @@
+"""Unit tests for conditional GET on WebApp reads."""
+from datetime import date
+from types import SimpleNamespace
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import etag as etag_module
+from src.api.auth import get_webapp_user
+from src.api.etag import data_etag, etag_matches, make_etag
+
+
+def test_make_etag_changes_with_version_day_and_query():
+    base = make_etag(1, 5, "today", date(2025, 3, 1))
+    assert base.startswith('"') and base.endswith('"')
+    assert base == make_etag(1, 5, "today", date(2025, 3, 1))
+    assert base != make_etag(1, 6, "today", date(2025, 3, 1))
+    assert base != make_etag(1, 5, "today", date(2025, 3, 2))
+    assert base != make_etag(1, 5, "stats", date(2025, 3, 1))
+    assert base != make_etag(1, 5, "today", date(2025, 3, 1), "month=2025-03")
+
+
+def test_etag_matches():
+    tag = '"abc"'
+    assert etag_matches('"x", "abc"', tag)
+    assert etag_matches('W/"abc"', tag)
+    assert etag_matches("*", tag)
+    assert not etag_matches(None, tag)
+    assert not etag_matches('"abcd"', tag)
+
+
+def _client(monkeypatch, version):
+    calls = []
+    app = FastAPI()
+
+    @app.get("/data", dependencies=[Depends(data_etag("data"))])
+    async def endpoint():
+        calls.append(1)
+        return {"ok": True}
+
+    async def fake_version(user_id):
+        if isinstance(version, Exception):
+            raise version
+        return version
+
+    app.dependency_overrides[get_webapp_user] = lambda: SimpleNamespace(id=7)
+    monkeypatch.setattr(etag_module, "get_data_version", fake_version)
+    return TestClient(app), calls
+
+
+def test_not_modified_skips_endpoint(monkeypatch):
+    client, calls = _client(monkeypatch, 3)
+    first = client.get("/data?month=2025-03")
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "private, no-cache"
+    tag = first.headers["ETag"]
+
+    second = client.get("/data?month=2025-03", headers={"If-None-Match": tag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == tag
+    assert second.content == b""
+    assert calls == [1]
+
+    other_query = client.get("/data?month=2025-04", headers={"If-None-Match": tag})
+    assert other_query.status_code == 200
+
+
+def test_redis_failure_serves_without_etag(monkeypatch):
+    client, calls = _client(monkeypatch, ConnectionError("down"))
+    resp = client.get("/data", headers={"If-None-Match": "*"})
+    assert resp.status_code == 200
+    assert "ETag" not in resp.headers
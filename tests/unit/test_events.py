@@ -0,0 +1,73 @@
+"""Unit tests for live change events (Redis fan-out and SSE stream)."""
+import json
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from src.api import auth
+from src.api.auth import get_stream_user_id, issue_stream_token
+from src.api.webapp import _event_stream
+from src.services import events
+from src.services.changes import KIND_PLAN, KIND_REMINDER, KIND_STATUS
+from src.services.events import EventBroker, build_events
+
+
+def test_build_events_groups_by_user():
+    changes = {
+        (1, KIND_STATUS, date(2025, 3, 2)),
+        (1, KIND_PLAN, date(2025, 3, 1)),
+        (1, KIND_STATUS, date(2025, 3, 1)),
+        (2, KIND_REMINDER, None),
+    }
+    assert build_events(changes) == [
+        {"user_id": 1, "kinds": [KIND_PLAN, KIND_STATUS], "days": ["2025-03-01", "2025-03-02"]},
+        {"user_id": 2, "kinds": [KIND_REMINDER], "days": []},
+    ]
+
+
+async def test_broker_fans_out_and_drops_oldest():
+    broker = EventBroker(queue_size=2)
+    first, second = broker.subscribe(1), broker.subscribe(1)
+    other = broker.subscribe(2)
+    for n in range(3):
+        broker.dispatch({"user_id": 1, "n": n})
+    assert [first.get_nowait()["n"], first.get_nowait()["n"]] == [1, 2]
+    assert second.qsize() == 2 and other.empty()
+    assert broker.stats() == {"users": 2, "streams": 3, "dropped": 2}
+    broker.unsubscribe(1, first)
+    broker.unsubscribe(1, second)
+    assert broker.stats()["users"] == 1
+
+
+async def test_published_message_reaches_local_stream(monkeypatch, fake_redis):
+    redis = fake_redis("src.services.events.get_redis")
+    broker = EventBroker()
+    monkeypatch.setattr(events, "event_broker", broker)
+    monkeypatch.setattr("src.api.webapp.event_broker", broker)
+
+    stream = _event_stream(7)
+    assert await anext(stream) == "retry: 5000\n\n"
+    await events.publish_user_events({(7, KIND_STATUS, date(2025, 3, 1)), (8, KIND_PLAN, None)})
+    channel, data = redis.published[0]
+    assert channel == events.EVENTS_CHANNEL
+    events._dispatch_message(data)  # what the Redis listener does on every replica
+    events._dispatch_message("not json")
+
+    chunk = await anext(stream)
+    assert chunk.startswith("event: change\ndata: ")
+    assert json.loads(chunk.split("data: ", 1)[1]) == {"kinds": [KIND_STATUS], "days": ["2025-03-01"]}
+    await stream.aclose()
+    assert broker.stats()["streams"] == 0
+
+
+async def test_stream_token_is_short_lived_and_single_use(fake_redis):
+    redis = fake_redis("src.api.auth.get_redis")
+
+    token = await issue_stream_token(7)
+    assert list(redis.ttl.values()) == [auth.STREAM_TOKEN_TTL_SECONDS]
+    assert await get_stream_user_id(token) == 7
+    for bad in (token, "forged", ""):
+        with pytest.raises(HTTPException) as exc:
+            await get_stream_user_id(bad)
+        assert exc.value.status_code == 401
@@ -0,0 +1,47 @@
+"""Unit tests for export encoding (CSV / NDJSON chunks)."""
+import csv
+import io
+import json
+
+import pytest
+
+from src.services import export
+from src.services.export import EXPORT_COLUMNS, format_rows
+
+ROWS = [
+    {"date": "2025-01-06", "position": 0, "task": "Отчёт, черновик", "status": "done", "comment": None,
+     "responded_at": "2025-01-06T20:00:00"},
+    {"date": "2025-01-07", "position": None, "task": None, "status": None, "comment": None, "responded_at": None},
+]
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _collect(fmt):
+    return [chunk async for chunk in format_rows(_aiter(ROWS), fmt)]
+
+
+async def test_csv_has_header_and_quotes():
+    text = "".join(await _collect("csv"))
+    parsed = list(csv.DictReader(io.StringIO(text)))
+    assert text.splitlines()[0] == ",".join(EXPORT_COLUMNS)
+    assert parsed[0]["task"] == "Отчёт, черновик"
+    assert parsed[1]["date"] == "2025-01-07" and parsed[1]["task"] == ""
+
+
+async def test_ndjson_one_object_per_line():
+    lines = "".join(await _collect("ndjson")).splitlines()
+    assert [json.loads(line) for line in lines] == ROWS
+
+
+async def test_output_is_chunked(monkeypatch):
+    monkeypatch.setattr(export, "CHUNK_SIZE", 10)
+    assert len(await _collect("ndjson")) == 2
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        format_rows(_aiter(ROWS), "xml")
@@ -0,0 +1,59 @@
+"""Unit tests for operator analytics: admin token check and row serialization."""
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.admin import require_admin_token
+from src.config import reload_settings
+from src.db.models import DailyGlobalStats
+from src.services.global_stats import serialize_global_stats
+
+
+@pytest.fixture(autouse=True)
+def _fresh_settings():
+    yield
+    reload_settings()
+
+
+def test_admin_api_disabled_without_token(monkeypatch):
+    monkeypatch.delenv("ADMIN_API_TOKEN", raising=False)
+    reload_settings()
+    with pytest.raises(HTTPException) as exc:
+        require_admin_token("anything")
+    assert exc.value.status_code == 404
+
+
+def test_admin_token_checked(monkeypatch):
+    monkeypatch.setenv("ADMIN_API_TOKEN", "s3cret")
+    reload_settings()
+    require_admin_token("s3cret")
+    for bad in ("", "wrong"):
+        with pytest.raises(HTTPException) as exc:
+            require_admin_token(bad)
+        assert exc.value.status_code == 401
+
+
+def test_serialize_global_stats_failure_rate():
+    row = DailyGlobalStats(
+        day=date(2025, 1, 6),
+        active_planners=10,
+        plans_created=12,
+        tasks_total=40,
+        plans_full=4,
+        plans_partial=5,
+        plans_zero=1,
+        avg_percent=63,
+        notifications_sent=30,
+        notifications_failed=10,
+        reminders_sent=9,
+        reminders_failed=1,
+        reminders_done=4,
+        computed_at=datetime(2025, 1, 7, 0, 5),
+    )
+    data = serialize_global_stats(row)
+    assert data["failure_rate"] == 0.25
+    assert data["completion"] == {"full": 4, "partial": 5, "zero": 1}
+    assert data["reminders"] == {"sent": 9, "failed": 1, "done": 4, "failure_rate": 0.1}
+    row.notifications_sent = row.notifications_failed = 0
+    assert serialize_global_stats(row)["failure_rate"] == 0.0
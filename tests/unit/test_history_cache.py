@@ -0,0 +1,43 @@
+"""Unit tests for the immutable-month history cache."""
+from datetime import date
+
+import pytest
+
+from src.services import cache, history_cache
+from src.services.changes import KIND_PLAN, KIND_STATUS
+from src.services.history_cache import cached_month, invalidate_history_months, is_immutable_month
+
+
+@pytest.fixture
+def redis(fake_redis, monkeypatch):
+    monkeypatch.setattr(history_cache, "counters", cache.CacheCounters())
+    return fake_redis("src.services.history_cache.get_binary_redis", decode_responses=False)
+
+
+def test_is_immutable_month():
+    # Default: a month is immutable once it ended more than 7 days ago.
+    assert not is_immutable_month(2025, 3, today=date(2025, 3, 20))
+    assert not is_immutable_month(2025, 2, today=date(2025, 3, 7))
+    assert is_immutable_month(2025, 2, today=date(2025, 3, 8))
+    assert is_immutable_month(2024, 12, today=date(2025, 3, 8))
+
+
+async def test_past_month_cached_until_its_plans_change(redis):
+    renders = []
+
+    async def render():
+        renders.append(1)
+        return b'{"n":%d}' % len(renders)
+
+    assert await cached_month(1, "2025-01", render) == b'{"n":1}'
+    assert await cached_month(1, "2025-01", render) == b'{"n":1}'
+
+    today = date(2025, 3, 20)
+    # Activity in the current month and in other users' history leaves the entry alone.
+    await invalidate_history_months({(1, KIND_STATUS, date(2025, 3, 19)), (2, KIND_PLAN, date(2025, 1, 5))}, today)
+    assert await cached_month(1, "2025-01", render) == b'{"n":1}'
+
+    await invalidate_history_months({(1, KIND_PLAN, date(2025, 1, 10))}, today)
+    assert await cached_month(1, "2025-01", render) == b'{"n":2}'
+    assert len(renders) == 2
+    assert history_cache.counters.as_dict() == {"hits": 2, "misses": 2, "errors": 0}
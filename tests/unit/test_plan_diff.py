@@ -0,0 +1,30 @@
+"""Unit tests for diff-based plan saving."""
+from src.services.plan import _diff_tasks
+
+
+def test_diff_new_plan_inserts_everything():
+    moves, deletes, inserts = _diff_tasks([], ["A", "B"])
+    assert moves == {}
+    assert deletes == []
+    assert inserts == [(0, "A"), (1, "B")]
+
+
+def test_diff_unchanged_plan_is_noop():
+    existing = [(10, 0, "A"), (11, 1, "B")]
+    assert _diff_tasks(existing, ["A", "B"]) == ({}, [], [])
+
+
+def test_diff_keeps_moved_rows_and_updates_positions():
+    existing = [(10, 0, "A"), (11, 1, "B"), (12, 2, "C")]
+    moves, deletes, inserts = _diff_tasks(existing, ["C", "A", "D"])
+    assert moves == {12: 0, 10: 1}
+    assert deletes == [11]
+    assert inserts == [(2, "D")]
+
+
+def test_diff_duplicate_texts_matched_in_order():
+    existing = [(10, 0, "A"), (11, 1, "A")]
+    moves, deletes, inserts = _diff_tasks(existing, ["B", "A"])
+    assert moves == {}
+    assert deletes == [10]
+    assert inserts == [(0, "B")]
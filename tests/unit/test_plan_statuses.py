@@ -0,0 +1,81 @@
+"""Unit tests for bulk task-status writes and the 'mark all done' button."""
+from datetime import date
+
+from sqlalchemy.dialects import postgresql
+
+from src.bot.keyboards import evening_inline_keyboard
+from src.services.changes import KIND_STATUS
+from src.services.evening import DONE, FAILED, PARTIAL, mark_plan_done, set_plan_statuses, set_task_status
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.value
+
+    def one_or_none(self):
+        return self.value
+
+
+class FakeSession:
+    """Answers the ownership check with plan_date, then the upsert with `written` rows."""
+
+    def __init__(self, plan_date, written=()):
+        self.results = [plan_date, list(written)]
+        self.statements = []
+        self.info = {}
+
+    async def execute(self, stmt, execution_options=None):
+        self.statements.append(stmt.compile(dialect=postgresql.dialect()))
+        return _Result(self.results[len(self.statements) - 1])
+
+
+async def test_set_plan_statuses_is_one_check_and_one_upsert():
+    session = FakeSession(date(2025, 3, 1), written=["ts1", "ts2"])
+    updates = [(1, DONE, None), (2, FAILED, "устал"), (1, PARTIAL, None)]
+    assert await set_plan_statuses(session, 5, updates, user_id=3) == 2
+    check, upsert = session.statements
+    assert "plan.user_id" in str(check)
+    assert "ON CONFLICT (task_id) DO UPDATE" in str(upsert)
+    assert "task.plan_id" in str(upsert)
+    # Repeated task_id: only the last update is sent.
+    assert sorted(v for v in upsert.params.values() if v in (DONE, PARTIAL, FAILED)) == [FAILED, PARTIAL]
+    assert session.info["pending_changes"] == {(3, KIND_STATUS, date(2025, 3, 1))}
+
+
+async def test_foreign_plan_is_not_written():
+    session = FakeSession(None)
+    assert await mark_plan_done(session, 5, user_id=4) is None
+    assert len(session.statements) == 1
+    assert "pending_changes" not in session.info
+
+
+async def test_empty_update_list_skips_queries():
+    session = FakeSession(date(2025, 3, 1))
+    assert await set_plan_statuses(session, 5, [], user_id=3) == 0
+    assert session.statements == []
+
+
+async def test_single_task_status_is_one_statement():
+    session = FakeSession(("ts", 3, date(2025, 3, 1)))
+    assert await set_task_status(session, 7, DONE, user_id=3) == "ts"
+    assert len(session.statements) == 1
+    sql = str(session.statements[0])
+    assert sql.startswith("WITH upserted AS") and "plan.user_id, plan.date" in sql
+    assert session.info["pending_changes"] == {(3, KIND_STATUS, date(2025, 3, 1))}
+
+
+def test_mark_all_done_button():
+    kb = evening_inline_keyboard([(1, None), (2, PARTIAL), (3, DONE)], plan_id=9)
+    assert kb.inline_keyboard[-1][0].callback_data == "plan_done_all_9"
+    single = evening_inline_keyboard([(1, None), (3, DONE)], plan_id=9)
+    assert all(row[0].callback_data != "plan_done_all_9" for row in single.inline_keyboard)
+    assert len(evening_inline_keyboard([(1, None), (2, None)]).inline_keyboard) == 2
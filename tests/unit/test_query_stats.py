@@ -0,0 +1,43 @@
+"""Unit tests for SQL query counting and query budgets."""
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.db.query_stats import current_query_stats, instrument_engine, track_queries
+
+
+@pytest.fixture
+def engine():
+    return instrument_engine(create_engine("sqlite://"))
+
+
+def test_track_queries_counts_statements(engine):
+    with track_queries() as stats:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    assert stats.count == 2
+    assert stats.duration >= 0
+    assert stats.statements == ["SELECT 1", "SELECT 2"]
+    assert current_query_stats() is None
+
+
+def test_instrument_engine_is_idempotent(engine):
+    instrument_engine(engine)
+    with track_queries() as stats:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    assert stats.count == 1
+
+
+def test_query_budget_within_limit(engine, query_budget):
+    with query_budget(1):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+
+def test_query_budget_exceeded_fails(engine, query_budget):
+    with pytest.raises(pytest.fail.Exception, match="Query budget exceeded: 2 > 1"):
+        with query_budget(1):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
@@ -0,0 +1,107 @@
+"""Unit tests for orjson responses and WebApp row serializers."""
+import json
+import timeit
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.api.responses import OrjsonResponse
+from src.api.serializers import HistoryItem, ReminderItem, TaskItem
+from src.services.stats import HistoryDay
+
+
+def _history(n: int) -> list[HistoryDay]:
+    start = date(2024, 1, 1)
+    return [HistoryDay(start + timedelta(days=i), i % 5 + 0.5, 5, (i * 7) % 101) for i in range(n)]
+
+
+def _reminders(n: int) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            id=i,
+            time_of_day=time(i % 24, i % 60),
+            description=f"Напоминание {i}",
+            repeat_interval_minutes=30,
+            max_attempts_per_day=3,
+            day_of_month=None if i % 2 else i % 28 + 1,
+            enabled=True,
+            done_today=bool(i % 3),
+            attempts_sent_today=i % 4,
+        )
+        for i in range(n)
+    ]
+
+
+def _dict_history(days):
+    return [{"date": d.date.isoformat(), "done": int(d.done), "total": d.total, "percent": d.percent} for d in days]
+
+
+def _dict_reminders(rows):
+    return [
+        {
+            "id": r.id,
+            "time_of_day": r.time_of_day.strftime("%H:%M"),
+            "description": r.description,
+            "repeat_interval_minutes": r.repeat_interval_minutes,
+            "max_attempts_per_day": r.max_attempts_per_day,
+            "day_of_month": r.day_of_month,
+            "enabled": r.enabled,
+            "done_today": r.done_today,
+            "attempts_sent_today": r.attempts_sent_today,
+        }
+        for r in rows
+    ]
+
+
+def test_serializers_match_previous_json():
+    days, rows = _history(40), _reminders(30)
+    fast = OrjsonResponse({"items": [HistoryItem.from_day(d) for d in days]}).body
+    assert json.loads(fast) == {"items": _dict_history(days)}
+    fast = OrjsonResponse([ReminderItem.from_row(r) for r in rows]).body
+    assert json.loads(fast) == _dict_reminders(rows)
+
+
+def test_task_item_without_status():
+    task = SimpleNamespace(id=1, position=0, text="Задача", status=None)
+    assert json.loads(OrjsonResponse(TaskItem.from_task(task)).body) == {
+        "id": 1,
+        "position": 0,
+        "text": "Задача",
+        "status": None,
+        "comment": None,
+    }
+
+
+def _encoders():
+    """Two years of history plus 200 reminders: old path (dicts + jsonable_encoder + json) and new one."""
+    days, rows = _history(731), _reminders(200)
+
+    def old():
+        content = {"items": _dict_history(days), "reminders": _dict_reminders(rows)}
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def new():
+        content = {
+            "items": [HistoryItem.from_day(d) for d in days],
+            "reminders": [ReminderItem.from_row(r) for r in rows],
+        }
+        return OrjsonResponse(content).body
+
+    return old, new
+
+
+def test_orjson_path_matches_old_encoding_on_large_lists():
+    old, new = _encoders()
+    assert json.loads(old()) == json.loads(new())
+
+
+@pytest.mark.benchmark
+def test_report_large_list_encoding_cost():
+    """Reports old vs new encoding time of the large payload; numbers only, no assertion (run with -s)."""
+    old, new = _encoders()
+    old_s = min(timeit.repeat(old, number=10, repeat=3)) / 10
+    new_s = min(timeit.repeat(new, number=10, repeat=3)) / 10
+    print(f"\nlarge list: old {old_s * 1e3:.2f} ms, orjson + slotted rows {new_s * 1e3:.2f} ms ({old_s / new_s:.1f}x)")
@@ -0,0 +1,135 @@
+"""Unit tests for graceful shutdown: draining updates on SIGTERM and closing resources in order."""
+import asyncio
+import os
+import signal
+from types import SimpleNamespace
+
+from src import main
+from src.api import webapp
+from src.api.webapp import _event_stream
+from src.bot import shutdown
+from src.bot.shutdown import InFlightMiddleware, close_resources
+from src.bot.update_queue import UpdateQueue
+from src.config import get_settings
+from src.services.events import EventBroker
+
+
+def _message(update_id: int, chat_id: int) -> dict:
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "from": {"id": chat_id}, "text": "x"}}
+
+
+def _webhook_request(update_id: int):
+    async def json():
+        return _message(update_id, chat_id=1)
+
+    return SimpleNamespace(headers={"X-Telegram-Bot-Api-Secret-Token": get_settings().webhook_secret}, json=json)
+
+
+async def test_sigterm_during_burst_with_open_stream(monkeypatch):
+    """SIGTERM under uvicorn: the open SSE stream ends at once, the lifespan shutdown drains the burst."""
+    done, closed = [], []
+
+    async def handler(update):
+        await asyncio.sleep(0.01)
+        done.append(update["update_id"])
+
+    async def forever():
+        await asyncio.Event().wait()
+
+    async def record_close(*resources):
+        closed.append(resources)
+
+    queue, broker = UpdateQueue(handler, workers=4), EventBroker()
+    monkeypatch.setattr(main, "update_queue", queue)
+    monkeypatch.setattr(main, "event_broker", broker)
+    monkeypatch.setattr(webapp, "event_broker", broker)
+    monkeypatch.setattr(main, "init_async_engine", lambda url: "engine")
+    monkeypatch.setattr(main, "set_async_session_factory", lambda engine: None)
+    monkeypatch.setattr(main, "run_invalidation_listener", forever)
+    monkeypatch.setattr(main, "run_event_listener", forever)
+    monkeypatch.setattr(main, "close_resources", record_close)
+    monkeypatch.setattr(main.webapp_shell, "load", lambda: None)
+    monkeypatch.setattr(main.timezone_detector_page, "load", lambda: None)
+
+    server_signals = []
+    # Stands in for uvicorn's handle_exit, which is installed before the lifespan starts.
+    previous = signal.signal(signal.SIGTERM, lambda signum, frame: server_signals.append(signum))
+    try:
+        async with main.lifespan(main.app):
+            stream = _event_stream(7)
+            assert await anext(stream) == "retry: 5000\n\n"
+            reader = asyncio.create_task(anext(stream, "ended"))
+            accepted = [i for i in range(20) if queue.submit(_message(i, chat_id=i % 5))]
+
+            os.kill(os.getpid(), signal.SIGTERM)
+            # Without this the server would wait for the stream until SIGKILL.
+            assert await asyncio.wait_for(reader, 1) == "ended"
+            assert server_signals == [signal.SIGTERM]
+            response = await main._handle_webhook(_webhook_request(99))
+            assert response.status_code == 503
+            assert done != accepted  # the burst is still being processed
+        # Leaving the context is uvicorn's lifespan shutdown, once no connection is open.
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+    assert accepted == list(range(20))
+    assert sorted(done) == accepted
+    assert queue.stats()["workers"] == 0
+    assert closed == [(main.bot, main.dp.storage, "engine")]
+
+
+async def test_drain_cancels_updates_past_deadline():
+    cancelled = []
+
+    async def handler(update):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(update["update_id"])
+            raise
+
+    queue = UpdateQueue(handler, workers=1)
+    queue.start()
+    queue.submit(_message(1, 10))
+    await asyncio.sleep(0)
+    assert not await queue.drain(timeout=0.05)
+    assert cancelled == [1]
+    assert not queue.submit(_message(2, 10))
+
+
+async def test_in_flight_middleware_drain():
+    in_flight = InFlightMiddleware()
+    finished = []
+
+    async def handler(event, data):
+        await asyncio.sleep(event.delay)
+        finished.append(event.update_id)
+
+    fast = asyncio.create_task(in_flight(handler, SimpleNamespace(update_id=1, delay=0.01), {}))
+    slow = asyncio.create_task(in_flight(handler, SimpleNamespace(update_id=2, delay=10), {}))
+    await asyncio.sleep(0)
+    assert len(in_flight.tasks) == 2
+
+    assert not await in_flight.drain(timeout=0.1)
+    assert finished == [1]
+    assert fast.done() and slow.cancelled()
+    assert not in_flight.tasks
+
+
+async def test_close_resources_in_order_despite_failures(monkeypatch):
+    closed = []
+
+    def closer(name, fail=False):
+        async def close():
+            closed.append(name)
+            if fail:
+                raise RuntimeError("boom")
+        return close
+
+    monkeypatch.setattr(shutdown, "close_redis", closer("redis"))
+    bot = SimpleNamespace(session=SimpleNamespace(close=closer("bot", fail=True)))
+    storage = SimpleNamespace(close=closer("storage"))
+    engine = SimpleNamespace(dispose=closer("engine"))
+
+    await close_resources(bot, storage, engine)
+    assert closed == ["bot", "storage", "redis", "engine"]
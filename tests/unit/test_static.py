@@ -0,0 +1,90 @@
+"""Unit tests for precompressed static files and the in-memory WebApp shell."""
+import importlib.util
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.api.static import IMMUTABLE_CACHE_CONTROL, InMemoryPage, PrecompressedStaticFiles, accepted_encodings
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _load_precompress():
+    spec = importlib.util.spec_from_file_location("precompress", PROJECT_ROOT / "scripts" / "precompress.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=0.5") == {"gzip"}
+    assert accepted_encodings("*") >= {"br", "gzip"}
+    assert accepted_encodings(None) == set()
+
+
+def _static_app(root: Path) -> TestClient:
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=str(root), immutable_prefixes=("dist/assets",)))
+    return TestClient(app)
+
+
+def test_precompressed_variant_and_cache_headers(tmp_path):
+    assets = tmp_path / "dist" / "assets"
+    assets.mkdir(parents=True)
+    script = "console.log('planning bot');\n" * 200
+    (assets / "index-a1b2c3d4.js").write_text(script)
+    (tmp_path / "webapp.js").write_text(script)
+    (tmp_path / "tiny.css").write_text("a{}")
+    assert _load_precompress().precompress(tmp_path) >= 2
+    assert (assets / "index-a1b2c3d4.js.gz").exists()
+    assert not (tmp_path / "tiny.css.gz").exists()
+
+    client = _static_app(tmp_path)
+    resp = client.get("/static/dist/assets/index-a1b2c3d4.js", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.headers["Content-Type"].startswith("text/javascript")
+    assert resp.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert resp.headers["Vary"] == "Accept-Encoding"
+    assert int(resp.headers["Content-Length"]) < len(script)
+    assert resp.text == script
+
+    plain = client.get("/static/webapp.js", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["Cache-Control"] == "no-cache"
+    assert plain.text == script
+
+    cached = client.get(
+        "/static/dist/assets/index-a1b2c3d4.js",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["ETag"]},
+    )
+    assert cached.status_code == 304
+    assert cached.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+
+
+def test_in_memory_page(tmp_path):
+    html = "<!doctype html><title>Planning Bot</title>" + "<div></div>" * 300
+    fallback = tmp_path / "template.html"
+    fallback.write_text(html)
+    page = InMemoryPage(tmp_path / "missing.html", fallback)
+    app = FastAPI()
+
+    @app.get("/webapp")
+    async def webapp(request: Request):
+        return page.response(request)
+
+    client = TestClient(app)
+    resp = client.get("/webapp", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert int(resp.headers["Content-Length"]) < len(html)
+    assert resp.text == html
+    fallback.unlink()  # served from memory from now on
+
+    not_modified = client.get("/webapp", headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["ETag"]})
+    assert not_modified.status_code == 304
+    plain = client.get("/webapp", headers={"Accept-Encoding": "identity", "If-None-Match": resp.headers["ETag"]})
+    assert plain.status_code == 200
+    assert "Content-Encoding" not in plain.headers
+    assert plain.text == html
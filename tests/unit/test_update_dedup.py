@@ -0,0 +1,74 @@
+"""Unit tests for update_id deduplication."""
+from types import SimpleNamespace
+
+import pytest
+
+from src import main
+from src.bot import middlewares
+from src.bot.middlewares import DedupCounters, UpdateDedupMiddleware
+from src.bot.update_queue import UpdateQueue
+from src.config import get_settings
+
+
+@pytest.fixture
+def redis(fake_redis):
+    return fake_redis("src.bot.middlewares.get_redis")
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    fresh = DedupCounters()
+    monkeypatch.setattr(middlewares, "dedup_counters", fresh)
+    return fresh
+
+
+async def _feed(middleware, update_id, bot_id=1):
+    handled = []
+
+    async def handler(event, data):
+        handled.append(event.update_id)
+        return "ok"
+
+    result = await middleware(handler, SimpleNamespace(update_id=update_id), {"bot": SimpleNamespace(id=bot_id)})
+    return result, handled
+
+
+async def test_redelivered_update_is_dropped(redis, counters):
+    middleware = UpdateDedupMiddleware()
+
+    assert await _feed(middleware, 100) == ("ok", [100])
+    assert await _feed(middleware, 100) == (None, [])
+    assert await _feed(middleware, 100, bot_id=2) == ("ok", [100])
+    assert redis.ttl["update_seen:1:100"] == 3600
+    assert counters.as_dict() == {"checked": 3, "dropped": 1, "errors": 0}
+
+
+async def test_redis_failure_lets_updates_through(redis, counters):
+    redis.fail = True
+    middleware = UpdateDedupMiddleware()
+    assert await _feed(middleware, 5) == ("ok", [5])
+    assert await _feed(middleware, 5) == ("ok", [5])
+    assert counters.errors == 2
+
+
+def _webhook_request(update_id):
+    async def json():
+        return {"update_id": update_id, "message": {"chat": {"id": 10}, "text": "x"}}
+
+    return SimpleNamespace(headers={"X-Telegram-Bot-Api-Secret-Token": get_settings().webhook_secret}, json=json)
+
+
+async def test_webhook_drops_redelivery_before_queueing(monkeypatch, redis, counters):
+    queue = UpdateQueue(main._process_update, max_pending=2)
+    monkeypatch.setattr(main, "update_queue", queue)
+
+    assert await main._handle_webhook(_webhook_request(1)) == {"ok": True}
+    assert await main._handle_webhook(_webhook_request(1)) == {"ok": True}
+    assert queue.pending == 1 and counters.dropped == 1
+
+    # A refused update gives its claim back, so Telegram's retry is processed.
+    assert await main._handle_webhook(_webhook_request(2)) == {"ok": True}
+    response = await main._handle_webhook(_webhook_request(3))
+    assert response.status_code == 503
+    assert f"update_seen:{main.bot.id}:3" not in redis.data
+    assert queue.pending == 2
@@ -0,0 +1,90 @@
+"""Unit tests for the webhook update worker pool."""
+import asyncio
+
+from src.bot.update_queue import UpdateQueue, chat_key
+
+
+def _message(update_id: int, chat_id: int) -> dict:
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "from": {"id": chat_id}, "text": "x"}}
+
+
+def _callback(update_id: int, chat_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {"id": "1", "from": {"id": chat_id}, "message": {"chat": {"id": chat_id}}},
+    }
+
+
+def test_chat_key():
+    assert chat_key(_message(1, 10)) == ("chat", 10)
+    assert chat_key(_callback(2, 10)) == ("chat", 10)
+    assert chat_key({"update_id": 3, "inline_query": {"from": {"id": 5}}}) == ("user", 5)
+    assert chat_key({"update_id": 4}) == ("update", 4)
+
+
+async def test_same_chat_in_order_other_chats_in_parallel():
+    log = []
+    running = set()
+    max_parallel = 0
+
+    async def handler(update):
+        nonlocal max_parallel
+        chat = chat_key(update)
+        assert chat not in running, "two updates of one chat ran concurrently"
+        running.add(chat)
+        max_parallel = max(max_parallel, len(running))
+        await asyncio.sleep(0.01)
+        log.append(update["update_id"])
+        running.discard(chat)
+
+    queue = UpdateQueue(handler, workers=4)
+    queue.start()
+    for i in range(12):
+        assert queue.submit(_message(i, chat_id=i % 3))
+    while queue.pending:
+        await asyncio.sleep(0.005)
+    await queue.stop()
+
+    for chat in range(3):
+        ids = [i for i in log if i % 3 == chat]
+        assert ids == sorted(ids)
+    assert max_parallel == 3
+    assert queue.stats()["processed"] == 12
+
+
+async def test_callbacks_first_and_rejects_when_full():
+    log = []
+
+    async def handler(update):
+        log.append(update["update_id"])
+
+    queue = UpdateQueue(handler, workers=1, max_pending=3)
+    assert queue.submit(_message(1, 10))
+    assert queue.submit(_message(2, 20))
+    assert queue.submit(_callback(3, 30))
+    assert not queue.submit(_message(4, 40))
+    queue.start()
+    while queue.pending:
+        await asyncio.sleep(0.005)
+    await queue.stop()
+    assert log == [3, 1, 2]
+    assert queue.stats()["rejected"] == 1
+
+
+async def test_handler_error_does_not_stall_chat():
+    log = []
+
+    async def handler(update):
+        if update["update_id"] == 1:
+            raise RuntimeError("boom")
+        log.append(update["update_id"])
+
+    queue = UpdateQueue(handler, workers=2)
+    queue.start()
+    queue.submit(_message(1, 10))
+    queue.submit(_message(2, 10))
+    while queue.pending:
+        await asyncio.sleep(0.005)
+    await queue.stop()
+    assert log == [2]
+    assert queue.stats()["chats"] == 0
@@ -0,0 +1,76 @@
+"""Unit tests for the in-process user snapshot cache."""
+from datetime import datetime, time
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.changes import KIND_PLAN, KIND_SETTINGS, has_pending_change, record_change
+from src.services.user_cache import UserSnapshot, UserSnapshotCache, _parse_user_ids
+
+
+def _snapshot(user_id: int, telegram_id: int, timezone: str = "UTC") -> UserSnapshot:
+    user = SimpleNamespace(
+        id=user_id,
+        telegram_id=telegram_id,
+        timezone=timezone,
+        notify_morning_time=time(7, 0),
+        notify_evening_time=time(21, 0),
+        morning_reminder_interval_minutes=60,
+        morning_reminder_max_attempts=1,
+        onboarding_tz_confirmed=True,
+        onboarding_morning_confirmed=True,
+        onboarding_evening_confirmed=True,
+        created_at=datetime(2025, 1, 1),
+        updated_at=datetime(2025, 1, 1),
+    )
+    return UserSnapshot.from_user(user)
+
+
+def test_snapshot_is_immutable():
+    snapshot = _snapshot(1, 100)
+    with pytest.raises(AttributeError):
+        snapshot.timezone = "Europe/Moscow"
+
+
+def test_get_put_and_invalidate_by_user_id():
+    cache = UserSnapshotCache()
+    cache.put(_snapshot(1, 100))
+    cache.put(_snapshot(2, 200))
+    assert cache.get(100).id == 1
+    cache.invalidate_user_ids([1, 999])
+    assert cache.get(100) is None
+    assert cache.get(200).id == 2
+    assert cache.stats() == {"size": 1, "hits": 2, "misses": 1}
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.services.user_cache.time_module.monotonic", lambda: now[0])
+    cache = UserSnapshotCache(ttl_seconds=10)
+    cache.put(_snapshot(1, 100))
+    now[0] += 10
+    assert cache.get(100) is not None
+    now[0] += 1
+    assert cache.get(100) is None
+
+
+def test_cache_is_bounded():
+    cache = UserSnapshotCache(maxsize=2)
+    for i in range(3):
+        cache.put(_snapshot(i, 100 + i))
+    assert cache.get(100) is None
+    assert cache.get(102) is not None
+    cache.invalidate_user_ids([0])  # evicted entry: no-op
+
+
+def test_parse_user_ids():
+    assert _parse_user_ids("1,2, 3,x,") == [1, 2, 3]
+
+
+def test_has_pending_change():
+    session = SimpleNamespace(info={})
+    record_change(session, 1, KIND_PLAN)
+    assert not has_pending_change(session, 1, KIND_SETTINGS)
+    record_change(session, 1, KIND_SETTINGS)
+    assert has_pending_change(session, 1, KIND_SETTINGS)
+    assert not has_pending_change(session, 2, KIND_SETTINGS)
@@ -1,11 +1,12 @@
 """Unit tests for Telegram WebApp initData validation."""
 import hashlib
 import hmac
+import time
 from urllib.parse import urlencode
 
 import pytest
 
-from src.api.auth import validate_webapp_init_data
+from src.api.auth import VerifiedInitDataCache, WebAppAuthPayload, init_data_cache, validate_webapp_init_data
 
 
 def _build_init_data(bot_token: str, values: dict[str, str]) -> str:
@@ -41,3 +42,54 @@ def test_validate_webapp_init_data_invalid_hash():
     init_data = urlencode({**values, "hash": "bad-hash"})
     with pytest.raises(ValueError, match="Invalid initData signature"):
         validate_webapp_init_data(init_data, token)
+
+
+@pytest.fixture
+def fresh_cache():
+    init_data_cache.clear()
+    yield init_data_cache
+    init_data_cache.clear()
+
+
+def _values(auth_date: int) -> dict[str, str]:
+    return {"auth_date": str(auth_date), "user": '{"id":12345,"first_name":"Test"}'}
+
+
+def test_verified_init_data_is_cached(fresh_cache):
+    token = "123456:test-token"
+    init_data = _build_init_data(token, _values(4102444800))
+    first = validate_webapp_init_data(init_data, token)
+    second = validate_webapp_init_data(init_data, token)
+    assert second is first
+    assert fresh_cache.stats() == {"size": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_cache_key_covers_whole_init_data(fresh_cache):
+    token = "123456:test-token"
+    init_data = _build_init_data(token, _values(4102444800))
+    validate_webapp_init_data(init_data, token)
+    tampered = init_data.replace("12345", "99999")
+    with pytest.raises(ValueError, match="Invalid initData signature"):
+        validate_webapp_init_data(tampered, token)
+    with pytest.raises(ValueError, match="Invalid initData signature"):
+        validate_webapp_init_data(init_data, "654321:other-token")
+
+
+def test_cached_payload_expires_with_auth_date(fresh_cache):
+    token = "123456:test-token"
+    auth_date = int(time.time()) - 50
+    init_data = _build_init_data(token, _values(auth_date))
+    validate_webapp_init_data(init_data, token, max_age_seconds=60)
+    key = fresh_cache.key(init_data, token, 60)
+    assert fresh_cache.get(key, auth_date + 60) is not None
+    assert fresh_cache.get(key, auth_date + 61) is None
+    assert fresh_cache.stats()["size"] == 0
+
+
+def test_cache_is_bounded():
+    cache = VerifiedInitDataCache(maxsize=2)
+    payload = WebAppAuthPayload(user_id=1, auth_date=0, query_id=None, raw={})
+    for key in (b"a", b"b", b"c"):
+        cache.put(key, payload, expires_at=100)
+    assert cache.get(b"a", 0) is None
+    assert cache.get(b"c", 0) is payload
@@ -0,0 +1,73 @@
+"""Unit tests for the WebApp bootstrap endpoint."""
+from datetime import datetime, time
+from types import SimpleNamespace
+
+import orjson
+from fastapi import Response
+
+from src.api import webapp
+from src.services.user_cache import UserSnapshot
+
+
+def _user() -> UserSnapshot:
+    return UserSnapshot(
+        id=7,
+        telegram_id=700,
+        timezone="Europe/Moscow",
+        notify_morning_time=time(8, 0),
+        notify_evening_time=time(21, 30),
+        morning_reminder_interval_minutes=60,
+        morning_reminder_max_attempts=2,
+        onboarding_tz_confirmed=True,
+        onboarding_morning_confirmed=True,
+        onboarding_evening_confirmed=True,
+        created_at=datetime(2025, 1, 1),
+        updated_at=datetime(2025, 1, 1),
+    )
+
+
+async def test_bootstrap_gathers_first_screen_with_one_session(monkeypatch):
+    session = object()
+    seen_sessions = []
+
+    def fake(result):
+        async def _call(s, user_id, *args):
+            seen_sessions.append(s)
+            assert user_id == 7
+            return result
+        return _call
+
+    reminder = SimpleNamespace(
+        id=1,
+        time_of_day=time(9, 15),
+        description="Вода",
+        repeat_interval_minutes=30,
+        max_attempts_per_day=3,
+        day_of_month=None,
+        enabled=True,
+        done_today=False,
+        attempts_sent_today=1,
+    )
+    monkeypatch.setattr(webapp, "get_today_plan", fake(None))
+    monkeypatch.setattr(webapp, "get_stats", fake({"total_plans": 3}))
+    monkeypatch.setattr(webapp, "list_reminder_rows", fake([reminder]))
+    monkeypatch.setattr(webapp, "get_reminder_stats", fake({"total": 1}))
+
+    response = Response()
+    response.headers["ETag"] = '"v1"'
+    result = await webapp.api_bootstrap(response=response, user=_user(), session=session)
+    assert result.headers["ETag"] == '"v1"'
+    data = orjson.loads(result.body)
+
+    assert seen_sessions == [session] * 4
+    assert data["today"]["exists"] is False
+    assert data["settings"] == {
+        "timezone": "Europe/Moscow",
+        "morning_time": "08:00",
+        "evening_time": "21:30",
+        "reminder_interval_minutes": 60,
+        "reminder_max_attempts": 2,
+    }
+    assert data["stats"] == {"total_plans": 3}
+    assert data["reminders"][0]["time_of_day"] == "09:15"
+    assert data["reminder_stats"] == {"total": 1}